@@ -1,36 +1,165 @@
+import json
+from datetime import datetime, time, timedelta
+
 from django.contrib import admin
-from django.utils.html import format_html
+from django.core.paginator import Paginator
+from django.db import connections
+from django.forms.models import BaseInlineFormSet
+from django.utils import timezone
+from django.utils.functional import cached_property
+from django.contrib.auth import get_user_model
+from django.utils.html import format_html, format_html_join
 from django.urls import reverse
+from maintenance.models import Property, Room
 from .models import Job, JobAttachment, JobChecklistItem, JobHistory
 
-class JobAttachmentInline(admin.TabularInline):
-    model = JobAttachment
+class EstimatedCountPaginator(Paginator):
+    """
+    Uses the planner's row estimate instead of COUNT(*) once a changelist is
+    large enough that the exact number no longer matters.
+    """
+    exact_count_threshold = 10000
+
+    @cached_property
+    def count(self):
+        query = self.object_list
+        if not hasattr(query, 'explain') or connections[query.db].vendor != 'postgresql':
+            return super().count
+        plan = json.loads(query.order_by().explain(format='json'))
+        estimate = int(plan[0]['Plan']['Plan Rows'])
+        if estimate < self.exact_count_threshold:
+            return super().count
+        return estimate
+
+class DateRangeListFilter(admin.SimpleListFilter):
+    """
+    Fixed windows expressed as half-open ranges on the raw column, so every
+    choice is a single index range scan.
+    """
+    field_name = None
+    windows = (
+        ('past_7', 'Past 7 days', -7, 1),
+        ('past_30', 'Past 30 days', -30, 1),
+        ('today', 'Today', 0, 1),
+        ('next_7', 'Next 7 days', 0, 8),
+        ('next_30', 'Next 30 days', 0, 31),
+    )
+
+    def lookups(self, request, model_admin):
+        return [(key, label) for key, label, _, _ in self.windows]
+
+    def queryset(self, request, queryset):
+        for key, _, start, end in self.windows:
+            if self.value() == key:
+                today = timezone.localdate()
+                lower, upper = today + timedelta(days=start), today + timedelta(days=end)
+                if queryset.model._meta.get_field(self.field_name).get_internal_type() == 'DateTimeField':
+                    lower = timezone.make_aware(datetime.combine(lower, time.min))
+                    upper = timezone.make_aware(datetime.combine(upper, time.min))
+                return queryset.filter(**{
+                    f'{self.field_name}__gte': lower,
+                    f'{self.field_name}__lt': upper,
+                })
+        return queryset
+
+def date_range_filter(field_name, title):
+    return type(f'{field_name.title()}Filter', (DateRangeListFilter,), {
+        'field_name': field_name,
+        'parameter_name': f'{field_name}_range',
+        'title': title,
+    })
+
+class CappedInlineFormSet(BaseInlineFormSet):
+    """Only loads the first ``max_rows`` related rows onto the change page."""
+    max_rows = 20
+
+    def get_queryset(self):
+        if not hasattr(self, '_capped_queryset'):
+            self._capped_queryset = super().get_queryset()[:self.max_rows]
+        return self._capped_queryset
+
+class CappedInline(admin.TabularInline):
+    formset = CappedInlineFormSet
     extra = 0
+
+class JobAttachmentInline(CappedInline):
+    model = JobAttachment
+    ordering = ['-uploaded_at']
     readonly_fields = ['uploaded_at']
     fields = ['file_name', 'file_url', 'file_type', 'file_size', 'uploaded_at']
 
-class JobChecklistItemInline(admin.TabularInline):
+class JobChecklistItemInline(CappedInline):
     model = JobChecklistItem
-    extra = 0
+    ordering = ['order', 'id']
     readonly_fields = ['completed_at']
     fields = ['title', 'description', 'is_completed', 'completed_at', 'order']
 
-class JobHistoryInline(admin.TabularInline):
+class JobHistoryInline(CappedInline):
     model = JobHistory
-    extra = 0
-    readonly_fields = ['performed_at']
+    ordering = ['-performed_at']
+    can_delete = False
+    readonly_fields = ['action', 'description', 'performed_at', 'previous_status', 'new_status']
     fields = ['action', 'description', 'performed_at', 'previous_status', 'new_status']
 
+    def has_add_permission(self, request, obj=None):
+        return False
+
+class ScalableModelAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+
+# Search-only admins that back the autocomplete widgets on the job admins:
+# they can be viewed and searched, never used to add, change or delete.
+class LookupAdmin(ScalableModelAdmin):
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+class UserLookupAdmin(LookupAdmin):
+    list_display = ['email', 'username', 'first_name', 'last_name', 'is_active']
+    fields = list_display
+    search_fields = ['email', 'username', 'first_name', 'last_name']
+    ordering = ['email']
+
+class PropertyLookupAdmin(LookupAdmin):
+    list_display = ['property_id', 'name', 'city', 'is_active']
+    search_fields = ['name', 'property_id']
+    ordering = ['name']
+
+class RoomLookupAdmin(LookupAdmin):
+    list_display = ['room_id', 'name', 'property', 'floor', 'is_active']
+    list_select_related = ['property']
+    search_fields = ['name', 'room_id']
+    ordering = ['name']
+
+LOOKUP_ADMINS = (
+    (get_user_model(), UserLookupAdmin),
+    (Property, PropertyLookupAdmin),
+    (Room, RoomLookupAdmin),
+)
+
+for lookup_model, lookup_admin in LOOKUP_ADMINS:
+    if not admin.site.is_registered(lookup_model):
+        admin.site.register(lookup_model, lookup_admin)
+
 @admin.register(Job)
-class JobAdmin(admin.ModelAdmin):
+class JobAdmin(ScalableModelAdmin):
     list_display = [
         'job_id', 'title', 'status', 'priority', 'type',
         'property_name', 'room_name', 'scheduled_date',
         'assigned_to', 'created_at', 'get_status_badge'
     ]
     list_filter = [
-        'status', 'priority', 'type', 'created_at',
-        'scheduled_date', 'completed_date'
+        'status', 'priority', 'type',
+        date_range_filter('created_at', 'created'),
+        date_range_filter('scheduled_date', 'scheduled date'),
+        date_range_filter('completed_date', 'completed date'),
     ]
     search_fields = [
         'job_id', 'title', 'description', 'notes',
@@ -38,8 +167,9 @@ class JobAdmin(admin.ModelAdmin):
     ]
     readonly_fields = [
         'job_id', 'created_at', 'updated_at',
-        'property_name', 'room_name'
+        'property_name', 'room_name', 'related_links'
     ]
+    autocomplete_fields = ['assigned_to', 'created_by', 'property', 'room']
     inlines = [JobAttachmentInline, JobChecklistItemInline, JobHistoryInline]
     fieldsets = (
         ('Basic Information', {
@@ -50,8 +180,8 @@ class JobAdmin(admin.ModelAdmin):
         }),
         ('Assignment', {
             'fields': (
-                'assigned_to', 'created_by', 'property_id',
-                'property_name', 'room_id', 'room_name',
+                'assigned_to', 'created_by', 'property',
+                'property_name', 'room', 'room_name',
                 'machine_id'
             )
         }),
@@ -61,6 +191,9 @@ class JobAdmin(admin.ModelAdmin):
                 'estimated_hours', 'actual_hours', 'cost'
             )
         }),
+        ('Related records', {
+            'fields': ('related_links',)
+        }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at'),
             'classes': ('collapse',)
@@ -83,31 +216,50 @@ class JobAdmin(admin.ModelAdmin):
         )
     get_status_badge.short_description = 'Status'
 
+    def related_links(self, obj):
+        if obj.pk is None:
+            return '-'
+        links = [
+            (f'{self.admin_site.name}:jobs_jobattachment_changelist', 'All attachments'),
+            (f'{self.admin_site.name}:jobs_jobchecklistitem_changelist', 'All checklist items'),
+            (f'{self.admin_site.name}:jobs_jobhistory_changelist', 'Full history'),
+        ]
+        return format_html_join(
+            ' | ', '<a href="{}?job__id__exact={}">{}</a>',
+            ((reverse(name), obj.pk, label) for name, label in links)
+        )
+    related_links.short_description = 'Related records'
+
     def get_queryset(self, request):
         return super().get_queryset(request).select_related(
-            'property', 'room', 'machine', 'assigned_user', 'creator'
+            'property', 'room', 'assigned_to', 'created_by'
         )
 
 @admin.register(JobAttachment)
-class JobAttachmentAdmin(admin.ModelAdmin):
+class JobAttachmentAdmin(ScalableModelAdmin):
     list_display = ['id', 'job', 'file_name', 'file_type', 'file_size', 'uploaded_at']
-    list_filter = ['file_type', 'uploaded_at']
+    list_filter = ['file_type', date_range_filter('uploaded_at', 'uploaded')]
+    list_select_related = ['job']
     search_fields = ['file_name', 'job__title']
     readonly_fields = ['uploaded_at']
+    autocomplete_fields = ['job', 'uploaded_by']
 
 @admin.register(JobChecklistItem)
-class JobChecklistItemAdmin(admin.ModelAdmin):
+class JobChecklistItemAdmin(ScalableModelAdmin):
     list_display = ['id', 'job', 'title', 'is_completed', 'completed_at', 'order']
-    list_filter = ['is_completed', 'completed_at']
+    list_filter = ['is_completed', date_range_filter('completed_at', 'completed')]
+    list_select_related = ['job']
     search_fields = ['title', 'description', 'job__title']
     readonly_fields = ['completed_at']
+    autocomplete_fields = ['job', 'completed_by']
 
 @admin.register(JobHistory)
-class JobHistoryAdmin(admin.ModelAdmin):
+class JobHistoryAdmin(ScalableModelAdmin):
     list_display = ['id', 'job', 'action', 'performed_at', 'previous_status', 'new_status']
-    list_filter = ['action', 'performed_at', 'previous_status', 'new_status']
+    list_filter = ['action', date_range_filter('performed_at', 'performed'), 'previous_status', 'new_status']
     search_fields = ['description', 'job__title']
     readonly_fields = ['performed_at']
+    autocomplete_fields = ['job', 'performed_by']
 
     def get_queryset(self, request):
-        return super().get_queryset(request).select_related('job', 'performer') 
\ No newline at end of file
+        return super().get_queryset(request).select_related('job', 'performed_by')
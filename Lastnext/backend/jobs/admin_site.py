@@ -36,11 +36,14 @@ job_admin_site = JobManagementAdminSite(name='job_admin')
 # Register the models with the custom admin site
 from .admin import (
     JobAdmin, JobAttachmentAdmin,
-    JobChecklistItemAdmin, JobHistoryAdmin
+    JobChecklistItemAdmin, JobHistoryAdmin, LOOKUP_ADMINS
 )
 from .models import Job, JobAttachment, JobChecklistItem, JobHistory
 
 job_admin_site.register(Job, JobAdmin)
 job_admin_site.register(JobAttachment, JobAttachmentAdmin)
 job_admin_site.register(JobChecklistItem, JobChecklistItemAdmin)
-job_admin_site.register(JobHistory, JobHistoryAdmin) 
\ No newline at end of file
+job_admin_site.register(JobHistory, JobHistoryAdmin)
+
+for lookup_model, lookup_admin in LOOKUP_ADMINS:
+    job_admin_site.register(lookup_model, lookup_admin)
@@ -0,0 +1,85 @@
+"""
+Property scoping for API callers.
+
+Staff users see every property; everyone else sees the properties they hold
+a ``UserProperty`` membership for. Memberships are new, so existing
+deployments start with none: run ``manage.py backfill_user_properties`` to
+derive them from the jobs each user created or is assigned. Until
+USER_PROPERTIES_FALLBACK is set to False (it defaults to True), a non-staff
+user without any membership stays unrestricted and a warning is logged,
+rather than being locked out of everything.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .batch import remember
+from .caching import bump_cache_version, cache_version
+from .db_router import PRIMARY_DB_ALIAS
+from .models import Job, JobChecklistItem, UserProperty
+
+logger = logging.getLogger(__name__)
+
+
+def membership_namespace(user_id):
+    return f'user-properties:{user_id}'
+
+
+def invalidate_user_properties(user_id):
+    bump_cache_version(membership_namespace(user_id))
+
+
+def _load_property_ids(user):
+    # Read from the primary: a lagging replica would cache revoked memberships under the new version.
+    namespace = membership_namespace(user.pk)
+    property_ids = cache.get_or_set(
+        f'{namespace}:{cache_version(namespace)}',
+        lambda: list(UserProperty.objects.using(PRIMARY_DB_ALIAS).filter(user=user).values_list('property_id', flat=True)),
+        getattr(settings, 'USER_PROPERTIES_CACHE_SECONDS', 300),
+    )
+    return frozenset(property_ids)
+
+
+def user_property_ids(user):
+    """Ids of the properties a user belongs to, or None when unrestricted."""
+    if user.is_staff or user.is_superuser:
+        return None
+    property_ids = remember(('property_ids', user.pk), lambda: _load_property_ids(user))
+    if not property_ids and getattr(settings, 'USER_PROPERTIES_FALLBACK', True):
+        logger.warning('User %s has no property memberships; not restricting them (USER_PROPERTIES_FALLBACK)',
+                       user.pk)
+        return None
+    return property_ids
+
+
+def scoped_property_ids(user, requested=None):
+    """The caller's property ids, narrowed by a comma-separated ``requested`` list."""
+    property_ids = user_property_ids(user)
+    if not requested:
+        return property_ids
+    wanted = {int(pk) for pk in requested.split(',') if pk.strip().isdigit()}
+    return wanted if property_ids is None else property_ids & wanted
+
+
+def property_id_from_data(data):
+    """The property validated serializer data writes into, if it names one."""
+    if data.get('property') is not None:
+        return data['property'].pk
+    if data.get('job') is not None:
+        return data['job'].property_id
+    return None
+
+
+def room_property_id_from_data(data):
+    """The property of the room validated serializer data attaches to, if it names one."""
+    return data['room'].property_id if data.get('room') is not None else None
+
+
+def property_id_of(instance):
+    """The property a job, checklist item, PM, room or machine belongs to."""
+    if isinstance(instance, JobChecklistItem):
+        if JobChecklistItem.job.is_cached(instance):
+            return instance.job.property_id
+        return Job.objects.filter(pk=instance.job_id).values_list('property_id', flat=True).first()
+    return instance.property_id
@@ -0,0 +1,156 @@
+"""
+Admission control for expensive endpoints.
+
+Each endpoint class (statistics, search, export) has a per-process
+concurrency cap: a request waits up to ``queue_timeout`` seconds for a slot
+and is shed with 503 otherwise. Each user may also start at most ``burst``
+requests per class in any sliding ``burst / rate`` second window, counted
+with atomic cache ``add``/``incr`` so the limit holds across workers; over
+the limit sheds with 429. A request shed with 503 is not counted. Both
+responses carry Retry-After. Override the defaults per class with ADMISSION_CLASSES, e.g.::
+
+    ADMISSION_CLASSES = {'statistics': {'concurrency': 8, 'rate': 0.5}}
+"""
+import math
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.exceptions import APIException, Throttled
+
+DEFAULT_CLASSES = {
+    'statistics': {'concurrency': 4, 'queue_timeout': 2.0, 'rate': 0.5, 'burst': 10},
+    'search': {'concurrency': 8, 'queue_timeout': 1.0, 'rate': 2.0, 'burst': 20},
+    'export': {'concurrency': 2, 'queue_timeout': 5.0, 'rate': 0.1, 'burst': 3},
+}
+
+
+class Overloaded(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'The server is busy; please retry shortly.'
+    default_code = 'overloaded'
+
+    def __init__(self, wait, detail=None):
+        super().__init__(detail)
+        # DRF's exception handler turns ``wait`` into a Retry-After header.
+        self.wait = wait
+
+
+class _Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = Counter()
+        self._queue_seconds = Counter()
+
+    def incr(self, name, key):
+        with self._lock:
+            self._counters[(name, key)] += 1
+
+    def waited(self, name, seconds):
+        with self._lock:
+            self._counters[(name, 'queued')] += 1
+            self._queue_seconds[name] += seconds
+
+    def snapshot(self):
+        with self._lock:
+            names = {name for name, _ in self._counters}
+            return {
+                name: {
+                    'admitted': self._counters[(name, 'admitted')],
+                    'queued': self._counters[(name, 'queued')],
+                    'queue_seconds': round(self._queue_seconds[name], 3),
+                    'rejected_rate_limited': self._counters[(name, 'rate_limited')],
+                    'rejected_overloaded': self._counters[(name, 'overloaded')],
+                }
+                for name in sorted(names)
+            }
+
+
+metrics = _Metrics()
+
+
+class AdmissionClass:
+    def __init__(self, name, concurrency, queue_timeout, rate, burst):
+        self.name = name
+        self.queue_timeout = queue_timeout
+        self.rate = rate
+        self.burst = burst
+        self._slots = threading.BoundedSemaphore(concurrency)
+
+    def _take_token(self, user_id):
+        """Count a request against the sliding window; returns (key to refund, seconds to wait)."""
+        if not self.rate:
+            return None, 0
+        window = self.burst / self.rate
+        now = time.time()
+        index, offset = divmod(now, window)
+        prefix = f'admission:{self.name}:{user_id}'
+        key = f'{prefix}:{int(index)}'
+        timeout = math.ceil(window * 2) + 1
+        cache.add(key, 0, timeout)
+        try:
+            count = cache.incr(key)
+        except ValueError:
+            # Evicted between add and incr.
+            cache.add(key, 1, timeout)
+            count = 1
+        previous = cache.get(f'{prefix}:{int(index) - 1}', 0)
+        elapsed = offset / window
+        if previous * (1 - elapsed) + count <= self.burst:
+            return key, 0
+
+        self._refund(key)
+        if count > self.burst or not previous:
+            return None, window - offset
+        # Wait until enough of the previous window has slid out.
+        return None, ((1 - (self.burst - count) / previous) - elapsed) * window
+
+    def _refund(self, key):
+        if key is None:
+            return
+        try:
+            cache.decr(key)
+        except ValueError:
+            pass
+
+    def acquire(self, user_id):
+        key, wait = self._take_token(user_id)
+        if wait:
+            metrics.incr(self.name, 'rate_limited')
+            raise Throttled(wait=max(1, math.ceil(wait)))
+
+        if self._slots.acquire(blocking=False):
+            metrics.incr(self.name, 'admitted')
+            return
+        started = time.monotonic()
+        admitted = self._slots.acquire(timeout=self.queue_timeout)
+        metrics.waited(self.name, time.monotonic() - started)
+        if not admitted:
+            # Shed for capacity, not for the user's rate: give the token back.
+            self._refund(key)
+            metrics.incr(self.name, 'overloaded')
+            raise Overloaded(wait=max(1, math.ceil(self.queue_timeout)))
+        metrics.incr(self.name, 'admitted')
+
+    def release(self):
+        self._slots.release()
+
+
+_classes = {}
+_classes_lock = threading.Lock()
+
+
+def admission_class(name):
+    with _classes_lock:
+        if name not in _classes:
+            config = {**DEFAULT_CLASSES.get(name, DEFAULT_CLASSES['statistics'])}
+            config.update(getattr(settings, 'ADMISSION_CLASSES', {}).get(name, {}))
+            _classes[name] = AdmissionClass(name, **config)
+        return _classes[name]
+
+
+def admission_metrics():
+    return metrics.snapshot()
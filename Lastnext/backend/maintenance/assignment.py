@@ -0,0 +1,122 @@
+"""
+Batch auto-assignment of unassigned jobs to technicians.
+
+Candidates are loaded once per batch (skills through the GIN index on
+``UserProfile.skills``), matched in memory by property membership, required
+skills and open workload, and the result is written with one bulk UPDATE
+plus one bulk INSERT of history rows through ``maintenance.audit``.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .audit import audit_scope, record_entry
+from .changefeed import record_changes
+from .models import Job, UserProfile, UserProperty
+
+OPEN_JOB_STATUSES = ('pending', 'in_progress', 'on_hold')
+PRIORITY_RANK = {'urgent': 0, 'high': 1, 'medium': 2, 'low': 3}
+
+
+def _load_technicians(property_ids, required_skills, any_unskilled):
+    profiles = UserProfile.objects.filter(
+        role='technician',
+        is_active=True,
+        user__is_active=True,
+        user__property_memberships__property_id__in=property_ids,
+    )
+    if required_skills and not any_unskilled:
+        skill_match = Q()
+        for skill in required_skills:
+            skill_match |= Q(skills__contains=[skill])
+        profiles = profiles.filter(skill_match)
+    return {
+        user_id: set(skills or [])
+        for user_id, skills in profiles.distinct().values_list('user_id', 'skills')
+    }
+
+
+def _open_workloads(user_ids):
+    rows = (
+        Job.objects.filter(assigned_to_id__in=user_ids, status__in=OPEN_JOB_STATUSES)
+        .values('assigned_to_id').annotate(count=Count('id')).order_by()
+    )
+    return {row['assigned_to_id']: row['count'] for row in rows}
+
+
+def match_jobs(jobs, skills_by_user, properties_by_user, workloads, max_open_jobs):
+    """Greedy matcher: most urgent jobs first, each to the least loaded qualified technician."""
+    users_by_property = defaultdict(list)
+    for user_id, property_ids in properties_by_user.items():
+        for property_id in property_ids:
+            users_by_property[property_id].append(user_id)
+
+    workloads = dict(workloads)
+    assignments = {}
+    ordered = sorted(jobs, key=lambda job: (PRIORITY_RANK.get(job.priority, 4), job.scheduled_date, job.pk))
+    for job in ordered:
+        required = set(job.required_skills or [])
+        best = None
+        for user_id in users_by_property.get(job.property_id, ()):
+            load = workloads.get(user_id, 0)
+            if load >= max_open_jobs or not required <= skills_by_user.get(user_id, set()):
+                continue
+            if best is None or load < workloads.get(best, 0):
+                best = user_id
+        if best is not None:
+            assignments[job.pk] = best
+            workloads[best] = workloads.get(best, 0) + 1
+    return assignments
+
+
+def auto_assign(performed_by, job_ids=None, limit=2000):
+    """Assign up to ``limit`` unassigned open jobs; returns {job pk: user id}."""
+    max_open_jobs = getattr(settings, 'AUTO_ASSIGN_MAX_OPEN_JOBS', 10)
+
+    with audit_scope(), transaction.atomic():
+        jobs = Job.objects.select_for_update(skip_locked=True).filter(
+            assigned_to__isnull=True, status__in=OPEN_JOB_STATUSES
+        )
+        if job_ids is not None:
+            jobs = jobs.filter(pk__in=job_ids)
+        jobs = list(jobs.order_by('scheduled_date', 'pk')[:limit])
+        if not jobs:
+            return {}
+
+        property_ids = {job.property_id for job in jobs}
+        required_skills = {skill for job in jobs for skill in (job.required_skills or [])}
+        any_unskilled = any(not job.required_skills for job in jobs)
+
+        skills_by_user = _load_technicians(property_ids, required_skills, any_unskilled)
+        properties_by_user = defaultdict(set)
+        memberships = UserProperty.objects.filter(
+            user_id__in=skills_by_user, property_id__in=property_ids
+        ).values_list('user_id', 'property_id')
+        for user_id, property_id in memberships:
+            properties_by_user[user_id].add(property_id)
+
+        assignments = match_jobs(
+            jobs, skills_by_user, properties_by_user,
+            _open_workloads(list(skills_by_user)), max_open_jobs,
+        )
+        if not assignments:
+            return {}
+
+        now = timezone.now()
+        assigned = [job for job in jobs if job.pk in assignments]
+        previous = {job.pk: job.assigned_to_id for job in assigned}
+        for job in assigned:
+            job.assigned_to_id = assignments[job.pk]
+            job.updated_at = now
+        Job.objects.bulk_update(assigned, ['assigned_to', 'updated_at'], batch_size=1000)
+        for job in assigned:
+            record_entry(
+                job.pk, 'assigned', f'Auto-assigned to user {job.assigned_to_id}', performed_by,
+                previous_status=job.status, new_status=job.status,
+                changes={'assigned_to': [previous[job.pk], job.assigned_to_id]},
+            )
+        record_changes(assigned, 'updated')
+    return assignments
@@ -0,0 +1,140 @@
+"""
+Automatic audit trail for jobs and checklist items.
+
+Model signals diff each saved ``Job`` and ``JobChecklistItem`` against the
+values it was loaded with and queue a ``JobHistory`` entry. An entry is only
+queued once its transaction commits (``transaction.on_commit``), so changes
+that roll back leave no history. Queued entries are written with one bulk
+INSERT when the enclosing ``audit_scope()`` ends:
+``maintenance.middleware.AuditTrailMiddleware`` opens one per request
+(batched sub-requests included) and management commands can open their
+own. Outside any scope each commit writes its entries straight away.
+
+Bulk writes skip the model signals, so code that uses ``bulk_create`` or
+``bulk_update`` queues its entries with ``record_entry`` itself.
+"""
+import json
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+EXCLUDED_FIELDS = {'id', 'updated_at', 'text_signature'}
+
+_buffer = ContextVar('audit_buffer', default=None)
+
+
+class _Buffer:
+    def __init__(self, user=None):
+        self.user = user
+        self.entries = []
+
+
+def _json(value):
+    return json.loads(json.dumps(value, cls=DjangoJSONEncoder))
+
+
+def diff(instance):
+    """{field: [old, new]} for the tracked fields of ``instance`` that changed since it was loaded."""
+    changes = {}
+    for field in instance._meta.concrete_fields:
+        if field.name in EXCLUDED_FIELDS or not instance.has_original(field.name):
+            continue
+        old, new = instance.original_value(field.name), getattr(instance, field.attname)
+        if old != new:
+            changes[field.name] = [old, new]
+    return _json(changes)
+
+
+def _describe(changes):
+    return '; '.join(f'{name}: {old} -> {new}' for name, (old, new) in changes.items())
+
+
+def _flush(entries, user=None):
+    from .models import JobHistory
+
+    if not entries:
+        return
+    if user is not None:
+        for entry in entries:
+            if entry.performed_by_id is None:
+                entry.performed_by = user
+    JobHistory.objects.bulk_create(entries, batch_size=1000)
+
+
+def _committed(entry):
+    buffer = _buffer.get()
+    if buffer is None:
+        _flush([entry])
+    else:
+        buffer.entries.append(entry)
+
+
+def record_entry(job_id, action, description, performed_by=None, previous_status=None, new_status=None, changes=None):
+    """Queue a history entry, written after the current transaction commits."""
+    from .models import JobHistory
+
+    entry = JobHistory(
+        job_id=job_id,
+        action=action,
+        description=description,
+        performed_by=performed_by,
+        previous_status=previous_status,
+        new_status=new_status,
+        changes=changes or {},
+    )
+    transaction.on_commit(partial(_committed, entry))
+
+
+def record_job_save(job, created):
+    if created:
+        record_entry(job.pk, 'created', f'Job created: {job.title}', new_status=job.status)
+        return
+    changes = diff(job)
+    if not changes:
+        return
+    status = changes.get('status')
+    record_entry(
+        job.pk,
+        status[1] if status else 'updated',
+        _describe(changes),
+        previous_status=status[0] if status else job.status,
+        new_status=job.status,
+        changes=changes,
+    )
+
+
+def record_checklist_item_save(item, created):
+    if created:
+        record_entry(item.job_id, 'checklist_item_added', f'{item.title} added')
+        return
+    changes = diff(item)
+    if not changes:
+        return
+    if 'is_completed' in changes:
+        action = 'checklist_item_completed' if item.is_completed else 'checklist_item_reopened'
+    else:
+        action = 'checklist_item_updated'
+    record_entry(
+        item.job_id, action, f'{item.title}: {_describe(changes)}',
+        performed_by=item.completed_by if action == 'checklist_item_completed' else None,
+        changes=changes,
+    )
+
+
+def record_checklist_item_delete(item):
+    record_entry(item.job_id, 'checklist_item_removed', f'{item.title} removed')
+
+
+@contextmanager
+def audit_scope(user=None):
+    """Collect committed history entries and write them in one INSERT on exit."""
+    buffer = _Buffer(user)
+    token = _buffer.set(buffer)
+    try:
+        yield buffer
+    finally:
+        _buffer.reset(token)
+        _flush(buffer.entries, buffer.user)
@@ -0,0 +1,94 @@
+"""
+In-process execution of batched API sub-requests.
+
+Sub-requests reuse the outer request's authenticated user and run inside a
+per-batch identity map, so objects and per-user lookups resolved by one
+sub-request are reused by the others instead of being fetched again.
+
+Only JSON endpoints can be batched. Streams, files and images are refused per
+item with a 400, and a sub-request that fails with an unexpected exception
+gets its own 500 without failing the rest of the batch.
+"""
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from urllib.parse import urlsplit
+
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+
+URLCONF = f'{__package__}.urls'
+NON_JSON_ROUTES = {'change-feed', 'image', 'reports-pdf'}
+
+logger = logging.getLogger(__name__)
+
+_identity_map = ContextVar('batch_identity_map', default=None)
+
+
+@contextmanager
+def identity_map_scope():
+    token = _identity_map.set({})
+    try:
+        yield
+    finally:
+        _identity_map.reset(token)
+
+
+def remember(key, factory):
+    """Return the batch-cached value for ``key``, computing it on first use."""
+    identity_map = _identity_map.get()
+    if identity_map is None:
+        return factory()
+    if key not in identity_map:
+        identity_map[key] = factory()
+    return identity_map[key]
+
+
+def _build_sub_request(request, path, query_string):
+    sub_request = HttpRequest()
+    sub_request.method = 'GET'
+    sub_request.path = sub_request.path_info = path
+    sub_request.META = {
+        **request._request.META,
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': query_string,
+    }
+    sub_request.GET = QueryDict(query_string)
+    sub_request.COOKIES = request._request.COOKIES
+    # Let DRF skip authentication: the batch request already did it.
+    sub_request._force_auth_user = request.user
+    sub_request._force_auth_token = request.auth
+    return sub_request
+
+
+def dispatch_sub_request(request, prefix, path):
+    """Resolve ``path`` against this app's router and run it in-process."""
+    url = urlsplit(path)
+    route = url.path
+    if route.startswith(prefix):
+        route = route[len(prefix):]
+    route = '/' + route.lstrip('/')
+
+    try:
+        match = resolve(route, urlconf=URLCONF)
+    except Resolver404:
+        return 404, {'detail': 'Not found.'}
+    if match.url_name == 'batch':
+        return 400, {'detail': 'Batch requests cannot be nested.'}
+    if match.url_name in NON_JSON_ROUTES:
+        return 400, {'detail': 'Only JSON endpoints can be batched.'}
+
+    sub_request = _build_sub_request(request, prefix.rstrip('/') + route, url.query)
+    try:
+        response = match.func(sub_request, *match.args, **match.kwargs)
+    except Exception:
+        logger.exception('Batched sub-request %s failed', route)
+        return 500, {'detail': 'Internal server error.'}
+    # Streamed JSON responses carry their payload in ``data`` too; whatever
+    # else was opened for the body (a file, a generator) is released here.
+    if response.streaming:
+        response.close()
+    if not hasattr(response, 'data'):
+        return 400, {'detail': 'Only JSON endpoints can be batched.'}
+    return response.status_code, response.data
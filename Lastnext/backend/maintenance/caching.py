@@ -0,0 +1,21 @@
+import time
+
+from django.core.cache import cache
+
+
+def _version_key(namespace):
+    return f'cache-version:{namespace}'
+
+
+def cache_version(namespace):
+    """Current version of a cache namespace; part of every key in it."""
+    return cache.get_or_set(_version_key(namespace), lambda: int(time.time() * 1000), None)
+
+
+def bump_cache_version(namespace):
+    """Invalidate every key built from the namespace's current version."""
+    try:
+        cache.incr(_version_key(namespace))
+    except ValueError:
+        # Missing (never read or evicted): start from a value no old key used.
+        cache.set(_version_key(namespace), int(time.time() * 1000), None)
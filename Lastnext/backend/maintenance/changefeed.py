@@ -0,0 +1,247 @@
+"""
+Change feed for jobs, checklist items and preventive maintenance.
+
+Model signals append small deltas to the ``ChangeEvent`` outbox inside the
+writing transaction, so an event exists exactly when its change committed.
+Each worker runs one ``ChangeFeedHub`` per event loop. The hub polls the
+outbox once per interval for all of its subscribers and fans new events out
+to per-connection queues, so the database cost does not grow with the
+number of open streams.
+
+Outbox ids are assigned when a row is inserted but become visible when its
+transaction commits, so a lower id can appear after a higher one. The hub
+remembers the ids it skipped and keeps asking for them for
+CHANGE_FEED_GAP_SECONDS before giving up (ids of rolled-back transactions
+never fill). Each frame's SSE id is the highest id below which nothing is
+still outstanding, so a client resuming with Last-Event-ID is replayed
+everything it might have missed. Delivery is at least once; clients apply
+events idempotently.
+
+The stream is an async generator and needs an ASGI server (uvicorn, daphne,
+...). Under WSGI Django would buffer it forever, so ``ChangeFeedView``
+answers 501 there instead.
+"""
+import asyncio
+import json
+import logging
+import time
+import weakref
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections
+from django.db.models import Q
+
+from .access import property_id_of
+from .models import ChangeEvent, Job, JobChecklistItem, PreventiveMaintenance
+
+ENTITY_FIELDS = {
+    Job: ('job', (
+        'job_id', 'title', 'status', 'priority', 'type', 'assigned_to_id',
+        'scheduled_date', 'completed_date', 'due_at', 'updated_at',
+    )),
+    PreventiveMaintenance: ('preventive_maintenance', (
+        'pm_id', 'pmtitle', 'status', 'frequency', 'scheduled_date',
+        'completed_date', 'updated_at',
+    )),
+    JobChecklistItem: ('job_checklist_item', (
+        'job_id', 'title', 'is_completed', 'completed_at', 'order',
+    )),
+}
+
+REPLAY_LIMIT = 1000
+QUEUE_SIZE = 1000
+MAX_TRACKED_GAP = 1000
+
+logger = logging.getLogger(__name__)
+
+
+def build_event(instance, action):
+    entity, fields = ENTITY_FIELDS[type(instance)]
+    payload = {} if action == 'deleted' else {field: getattr(instance, field) for field in fields}
+    return ChangeEvent(
+        entity=entity,
+        entity_id=instance.pk,
+        action=action,
+        property_id=property_id_of(instance),
+        payload=payload,
+    )
+
+
+def record_change(instance, action):
+    """Append an outbox event in the caller's transaction."""
+    build_event(instance, action).save()
+
+
+def record_changes(instances, action):
+    """Outbox events for bulk writes, which bypass model signals."""
+    ChangeEvent.objects.bulk_create([build_event(instance, action) for instance in instances])
+
+
+def format_sse(event, resume_id=None):
+    data = json.dumps({
+        'entity': event['entity'],
+        'id': event['entity_id'],
+        'action': event['action'],
+        'property_id': event['property_id'],
+        'changes': event['payload'],
+        'at': event['created_at'],
+    }, cls=DjangoJSONEncoder)
+    return f"id: {event['id'] if resume_id is None else resume_id}\nevent: {event['entity']}\ndata: {data}\n\n"
+
+
+def _fetch_events(after_id, property_ids=None, limit=None, until_id=None, missing_ids=()):
+    close_old_connections()
+    try:
+        position = Q(id__gt=after_id)
+        if until_id is not None:
+            position &= Q(id__lte=until_id)
+        if missing_ids:
+            position |= Q(id__in=missing_ids)
+        events = ChangeEvent.objects.filter(position).order_by('id')
+        if property_ids is not None:
+            events = events.filter(property_id__in=property_ids)
+        events = events.values('id', 'entity', 'entity_id', 'action', 'property_id', 'payload', 'created_at')
+        return list(events[:limit] if limit else events)
+    finally:
+        close_old_connections()
+
+
+def _recent_event_ids():
+    """The newest MAX_TRACKED_GAP outbox ids, newest first."""
+    close_old_connections()
+    try:
+        return list(ChangeEvent.objects.order_by('-id').values_list('id', flat=True)[:MAX_TRACKED_GAP])
+    finally:
+        close_old_connections()
+
+
+class _Subscriber:
+    def __init__(self, property_ids):
+        self.property_ids = property_ids
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.overflowed = False
+
+    def offer(self, event):
+        if self.property_ids is not None and event['property_id'] not in self.property_ids:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too slow to keep up; the client reconnects with Last-Event-ID.
+            self.overflowed = True
+
+
+class ChangeFeedHub:
+    def __init__(self, poll_interval=1.0, gap_seconds=60.0):
+        self.poll_interval = poll_interval
+        self.gap_seconds = gap_seconds
+        self.subscribers = set()
+        self.last_id = None
+        self.gaps = {}
+        self._task = None
+
+    def watermark(self):
+        """Highest id at or below which every event has been seen or given up on."""
+        return min(self.gaps) - 1 if self.gaps else self.last_id
+
+    def _note_gaps(self, upto):
+        now = time.monotonic()
+        for missing in range(max(self.last_id + 1, upto - MAX_TRACKED_GAP), upto):
+            self.gaps[missing] = now
+
+    async def _start(self):
+        recent = await sync_to_async(_recent_event_ids, thread_sensitive=False)()
+        if not recent:
+            self.last_id = 0
+            return
+        present, now = set(recent), time.monotonic()
+        self.gaps = {
+            event_id: now for event_id in range(recent[-1] + 1, recent[0]) if event_id not in present
+        }
+        self.last_id = recent[0]
+
+    def _track(self, events):
+        fresh = []
+        for event in events:
+            event_id = event['id']
+            if self.gaps.pop(event_id, None) is not None:
+                fresh.append(event)
+            elif event_id > self.last_id:
+                self._note_gaps(event_id)
+                self.last_id = event_id
+                fresh.append(event)
+        expiry = time.monotonic() - self.gap_seconds
+        self.gaps = {event_id: seen for event_id, seen in self.gaps.items() if seen > expiry}
+        return fresh
+
+    def _ensure_polling(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._poll())
+
+    async def _poll(self):
+        fetch = sync_to_async(_fetch_events, thread_sensitive=False)
+        while self.subscribers:
+            try:
+                events = await fetch(self.last_id, limit=REPLAY_LIMIT, missing_ids=list(self.gaps))
+            except Exception:
+                logger.exception('Change feed poll failed; retrying')
+                await asyncio.sleep(self.poll_interval)
+                continue
+            for event in self._track(events):
+                for subscriber in list(self.subscribers):
+                    subscriber.offer(event)
+            if len(events) < REPLAY_LIMIT:
+                await asyncio.sleep(self.poll_interval)
+
+    async def stream(self, property_ids, last_event_id=None, heartbeat=15):
+        """Yield SSE frames: a replay after ``last_event_id``, then live events."""
+        if self.last_id is None:
+            await self._start()
+        subscriber = _Subscriber(property_ids)
+        self.subscribers.add(subscriber)
+        self._ensure_polling()
+        try:
+            # Live delivery covers everything after the hub's position; replay
+            # stops there, re-reading ids the hub is still waiting for.
+            until = self.last_id
+            cursor = last_event_id
+            while cursor is not None and cursor < until:
+                backlog = await sync_to_async(_fetch_events, thread_sensitive=False)(
+                    cursor, property_ids, REPLAY_LIMIT, until
+                )
+                for event in backlog:
+                    yield format_sse(event, min(event['id'], self.watermark()))
+                if len(backlog) < REPLAY_LIMIT:
+                    break
+                cursor = backlog[-1]['id']
+            yield ': connected\n\n'
+            while not subscriber.overflowed:
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+                yield format_sse(event, min(event['id'], self.watermark()))
+        finally:
+            self.subscribers.discard(subscriber)
+
+
+_hubs = weakref.WeakKeyDictionary()
+
+
+def get_hub():
+    """The hub for the running event loop."""
+    loop = asyncio.get_running_loop()
+    if loop not in _hubs:
+        _hubs[loop] = ChangeFeedHub(
+            getattr(settings, 'CHANGE_FEED_POLL_SECONDS', 1.0),
+            getattr(settings, 'CHANGE_FEED_GAP_SECONDS', 60.0),
+        )
+    return _hubs[loop]
+
+
+async def change_stream(property_ids, last_event_id=None):
+    async for frame in get_hub().stream(property_ids, last_event_id):
+        yield frame
@@ -0,0 +1,177 @@
+"""
+Checklist templates and bulk job generation from preventive maintenance.
+
+Templates attach to machines and topics. ``instantiate_checklists`` turns the
+templates chosen for any number of jobs into ``JobChecklistItem`` rows with
+one query for the template items and one bulk INSERT; a job whose templates
+have no items falls back to the lines of its free-text procedure. And
+``generate_pm_jobs`` creates the jobs for PM occurrences in a date window the
+same way, so the number of queries depends on the batch count only.
+"""
+from collections import defaultdict
+import re
+
+from django.db import transaction
+
+from .audit import audit_scope, record_checklist_item_save, record_entry
+from .changefeed import record_changes
+from .dedupe import text_signature
+from .forecasting import fill_estimated_hours
+from .models import (
+    ChecklistTemplate, ChecklistTemplateItem, Job, JobChecklistItem, Machine,
+    PreventiveMaintenance
+)
+from .pm_calendar import recurrence_dates
+from .sla import refresh_due_at
+
+OPEN_PM_STATUSES = ('pending', 'overdue')
+_STEP_PREFIX = re.compile(r'^\s*(?:[-*\u2022]|\d+[.)])?\s*')
+
+
+def procedure_steps(text):
+    """Checklist titles from free-text procedure lines, bullets and numbering stripped."""
+    steps = (_STEP_PREFIX.sub('', line).strip() for line in (text or '').splitlines())
+    return [step[:200] for step in steps if step]
+
+
+def templates_by_key(machine_ids_by_key=None, topic_ids_by_key=None):
+    """Active template ids matching each key's machines/topics: {key: [template id, ...]}."""
+    machine_ids_by_key = machine_ids_by_key or {}
+    topic_ids_by_key = topic_ids_by_key or {}
+    matches = defaultdict(list)
+    for relation, ids_by_key, column in (
+        (ChecklistTemplate.machines.through, machine_ids_by_key, 'machine_id'),
+        (ChecklistTemplate.topics.through, topic_ids_by_key, 'topic_id'),
+    ):
+        wanted = {pk for ids in ids_by_key.values() for pk in ids}
+        if not wanted:
+            continue
+        templates_by_related = defaultdict(list)
+        rows = relation.objects.filter(
+            **{f'{column}__in': wanted, 'checklisttemplate__is_active': True}
+        ).values_list(column, 'checklisttemplate_id')
+        for related_id, template_id in rows:
+            templates_by_related[related_id].append(template_id)
+        for key, ids in ids_by_key.items():
+            for related_id in ids:
+                matches[key].extend(templates_by_related.get(related_id, ()))
+    return {key: sorted(set(template_ids)) for key, template_ids in matches.items()}
+
+
+def instantiate_checklists(job_templates, batch_size=1000):
+    """Create checklist items for [(job, [template id, ...], [fallback step, ...]), ...]; returns the items."""
+    template_ids = {pk for _, ids, _ in job_templates for pk in ids}
+    items_by_template = defaultdict(list)
+    if template_ids:
+        rows = ChecklistTemplateItem.objects.filter(template_id__in=template_ids).values_list(
+            'template_id', 'title', 'description'
+        )
+        for template_id, title, description in rows:
+            items_by_template[template_id].append((title, description))
+
+    items = []
+    for job, ids, fallback in job_templates:
+        steps = [step for template_id in ids for step in items_by_template.get(template_id, ())]
+        if not steps:
+            steps = [(title, None) for title in fallback]
+        items.extend(
+            JobChecklistItem(job=job, title=title, description=description, order=order)
+            for order, (title, description) in enumerate(steps, 1)
+        )
+    if items:
+        JobChecklistItem.objects.bulk_create(items, batch_size=batch_size)
+        record_changes(items, 'created')
+        for item in items:
+            record_checklist_item_save(item, created=True)
+    return items
+
+
+def job_templates_for(job, extra_template_ids=()):
+    """Template ids for a single new job: explicit ones plus those of its machine."""
+    template_ids = list(extra_template_ids)
+    if job.machine_id:
+        machine_ids = list(Machine.objects.filter(machine_id=job.machine_id).values_list('pk', flat=True))
+        template_ids += templates_by_key({job.pk: machine_ids}).get(job.pk, [])
+    return list(dict.fromkeys(template_ids))
+
+
+def pm_job_id(pm, day):
+    """``Job.job_id`` for a PM occurrence, keyed by primary key so it fits and survives renames."""
+    return f'PM-{pm.pk}-{day:%Y%m%d}'
+
+
+def _occurrences(pm, start, end):
+    if start <= pm.scheduled_date <= end:
+        yield pm.scheduled_date
+    for day in recurrence_dates(pm.scheduled_date, pm.frequency, pm.custom_days, end):
+        if day >= start:
+            yield day
+
+
+def _pm_job(pm, day, created_by):
+    machines = list(pm.machines.all())
+    description = pm.procedure or pm.notes or ''
+    job = Job(
+        job_id=pm_job_id(pm, day),
+        title=pm.pmtitle,
+        description=description,
+        status='pending',
+        priority='medium',
+        type='maintenance',
+        created_by=created_by,
+        property=pm.property,
+        room=pm.room,
+        property_name=pm.property.name,
+        room_name=pm.room.name if pm.room is not None else None,
+        machine_id=machines[0].machine_id if len(machines) == 1 else None,
+        scheduled_date=day,
+        text_signature=text_signature(pm.pmtitle, description),
+    )
+    refresh_due_at(job)
+    return job
+
+
+def generate_pm_jobs(start, end, created_by, batch_size=500, progress=None):
+    """Create a job (with checklist) for every open PM occurrence in [start, end]; returns jobs created."""
+    pms = (
+        PreventiveMaintenance.objects.filter(status__in=OPEN_PM_STATUSES, scheduled_date__lte=end)
+        .select_related('property', 'room')
+        .prefetch_related('machines', 'topics')
+        .order_by('pk')
+    )
+    created, batch = 0, []
+
+    def flush():
+        nonlocal created
+        candidates = {pm_job_id(pm, day): (pm, day) for pm in batch for day in _occurrences(pm, start, end)}
+        existing = set(Job.objects.filter(job_id__in=candidates).values_list('job_id', flat=True))
+        pending = {job_id: occurrence for job_id, occurrence in candidates.items() if job_id not in existing}
+        if not pending:
+            return
+        templates = templates_by_key(
+            {pm.pk: [machine.pk for machine in pm.machines.all()] for pm in batch},
+            {pm.pk: [topic.pk for topic in pm.topics.all()] for pm in batch},
+        )
+        jobs = [_pm_job(pm, day, created_by) for pm, day in pending.values()]
+        fill_estimated_hours(jobs)
+        with audit_scope(), transaction.atomic():
+            jobs = Job.objects.bulk_create(jobs)
+            record_changes(jobs, 'created')
+            for job in jobs:
+                record_entry(job.pk, 'created', f'Job created: {job.title}', created_by, new_status=job.status)
+            instantiate_checklists([
+                (job, templates.get(pm.pk, []), procedure_steps(pm.procedure))
+                for job, (pm, _) in zip(jobs, pending.values())
+            ])
+        created += len(jobs)
+        if progress:
+            progress(created)
+
+    for pm in pms.iterator(chunk_size=batch_size):
+        batch.append(pm)
+        if len(batch) >= batch_size:
+            flush()
+            batch = []
+    if batch:
+        flush()
+    return created
@@ -0,0 +1,125 @@
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .access import membership_namespace, user_property_ids
+from .caching import cache_version
+from .models import Job, PreventiveMaintenance, Property
+from .statistics import gather_queries, run_statistics
+
+OPEN_JOB_STATUSES = ('pending', 'in_progress', 'on_hold')
+UPCOMING_DAYS = 7
+ITEM_LIMIT = 10
+
+JOB_ITEM_FIELDS = ('id', 'job_id', 'title', 'status', 'priority', 'property_id', 'scheduled_date')
+PM_ITEM_FIELDS = ('id', 'pm_id', 'pmtitle', 'status', 'property_id', 'scheduled_date')
+
+
+def _scoped(queryset, property_ids, field='property_id'):
+    if property_ids is None:
+        return queryset
+    return queryset.filter(**{f'{field}__in': property_ids})
+
+
+async def _summary_queries(property_ids, today):
+    jobs = _scoped(Job.objects.all(), property_ids)
+    pms = _scoped(PreventiveMaintenance.objects.all(), property_ids)
+    horizon = today + timedelta(days=UPCOMING_DAYS)
+    overdue_pm = Q(status='overdue') | Q(status='pending', scheduled_date__lt=today)
+
+    return await gather_queries({
+        'properties': lambda: list(
+            _scoped(Property.objects.all(), property_ids, 'pk').values('id', 'property_id', 'name')
+        ),
+        'job_groups': lambda: list(
+            jobs.values('property_id', 'status', 'priority', 'type')
+            .annotate(count=Count('id')).order_by()
+        ),
+        'pm_groups': lambda: list(
+            pms.values('property_id', 'status', 'frequency')
+            .annotate(count=Count('id')).order_by()
+        ),
+        'upcoming_jobs': lambda: list(
+            jobs.filter(status__in=OPEN_JOB_STATUSES, scheduled_date__range=(today, horizon))
+            .order_by('scheduled_date').values(*JOB_ITEM_FIELDS)[:ITEM_LIMIT]
+        ),
+        'overdue_jobs': lambda: list(
+            jobs.filter(status__in=OPEN_JOB_STATUSES, scheduled_date__lt=today)
+            .order_by('scheduled_date').values(*JOB_ITEM_FIELDS)[:ITEM_LIMIT]
+        ),
+        'upcoming_pms': lambda: list(
+            pms.filter(status='pending', scheduled_date__range=(today, horizon))
+            .order_by('scheduled_date').values(*PM_ITEM_FIELDS)[:ITEM_LIMIT]
+        ),
+        'overdue_pms': lambda: list(
+            pms.filter(overdue_pm).order_by('scheduled_date').values(*PM_ITEM_FIELDS)[:ITEM_LIMIT]
+        ),
+    })
+
+
+def build_dashboard_summary(property_ids, today=None):
+    today = today or timezone.localdate()
+    results = run_statistics(_summary_queries, property_ids, today)
+
+    jobs_by_status, jobs_by_priority, jobs_by_type = Counter(), Counter(), Counter()
+    pms_by_status, pms_by_frequency = Counter(), Counter()
+    per_property = defaultdict(lambda: {
+        'jobs': {'total': 0, 'open': 0, 'completed': 0},
+        'maintenance': {'total': 0, 'pending': 0, 'overdue': 0, 'completed': 0},
+    })
+
+    for row in results['job_groups']:
+        count = row['count']
+        jobs_by_status[row['status']] += count
+        jobs_by_priority[row['priority']] += count
+        jobs_by_type[row['type']] += count
+        rollup = per_property[row['property_id']]['jobs']
+        rollup['total'] += count
+        if row['status'] in OPEN_JOB_STATUSES:
+            rollup['open'] += count
+        elif row['status'] == 'completed':
+            rollup['completed'] += count
+
+    for row in results['pm_groups']:
+        count = row['count']
+        pms_by_status[row['status']] += count
+        pms_by_frequency[row['frequency']] += count
+        rollup = per_property[row['property_id']]['maintenance']
+        rollup['total'] += count
+        if row['status'] in rollup:
+            rollup[row['status']] += count
+
+    return {
+        'generated_at': timezone.now(),
+        'jobs': {
+            'total': sum(jobs_by_status.values()),
+            'by_status': dict(jobs_by_status),
+            'by_priority': dict(jobs_by_priority),
+            'by_type': dict(jobs_by_type),
+            'upcoming': results['upcoming_jobs'],
+            'overdue': results['overdue_jobs'],
+        },
+        'preventive_maintenance': {
+            'total': sum(pms_by_status.values()),
+            'by_status': dict(pms_by_status),
+            'by_frequency': dict(pms_by_frequency),
+            'upcoming': results['upcoming_pms'],
+            'overdue': results['overdue_pms'],
+        },
+        'properties': [
+            {**prop, **per_property[prop['id']]} for prop in results['properties']
+        ],
+    }
+
+
+def dashboard_summary_for(user):
+    """Per-user summary, cached for DASHBOARD_SUMMARY_CACHE_SECONDS."""
+    return cache.get_or_set(
+        f'dashboard-summary:{user.pk}:{cache_version(membership_namespace(user.pk))}',
+        lambda: build_dashboard_summary(user_property_ids(user)),
+        getattr(settings, 'DASHBOARD_SUMMARY_CACHE_SECONDS', 30),
+    )
@@ -0,0 +1,87 @@
+"""
+Primary/replica database routing.
+
+Enable with::
+
+    DATABASE_ROUTERS = ['maintenance.db_router.PrimaryReplicaRouter']
+
+Every alias in DATABASES other than 'default' is treated as a replica unless
+DATABASE_REPLICAS lists them explicitly. Reads only go to a replica inside
+``read_from_replica()``, which the viewsets enable for safe-method requests
+(see ``maintenance.mixins.ReplicaReadMixin``). For tests, point the replica at
+the primary with ``'TEST': {'MIRROR': 'default'}``.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+
+PRIMARY_DB_ALIAS = 'default'
+
+_reading_from_replica = ContextVar('reading_from_replica', default=False)
+
+
+def replica_aliases():
+    replicas = getattr(settings, 'DATABASE_REPLICAS', None)
+    if replicas is None:
+        replicas = [alias for alias in settings.DATABASES if alias != PRIMARY_DB_ALIAS]
+    return list(replicas)
+
+
+def _sticky_key(user_id):
+    return f'db-router:primary-pin:{user_id}'
+
+
+def pin_to_primary(user):
+    """Keep this user's reads on the primary for REPLICA_STICKY_SECONDS."""
+    if user is None or not user.is_authenticated:
+        return
+    cache.set(_sticky_key(user.pk), True, getattr(settings, 'REPLICA_STICKY_SECONDS', 5))
+
+
+def is_pinned_to_primary(user):
+    if user is None or not user.is_authenticated:
+        return False
+    return cache.get(_sticky_key(user.pk), False)
+
+
+def start_replica_reads(enabled=True):
+    return _reading_from_replica.set(enabled)
+
+
+def end_replica_reads(token):
+    _reading_from_replica.reset(token)
+
+
+@contextmanager
+def read_from_replica(enabled=True):
+    token = start_replica_reads(enabled)
+    try:
+        yield
+    finally:
+        end_replica_reads(token)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _reading_from_replica.get():
+            replicas = replica_aliases()
+            if replicas:
+                return random.choice(replicas)
+        return PRIMARY_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {PRIMARY_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in replica_aliases():
+            return False
+        return None
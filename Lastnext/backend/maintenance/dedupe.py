@@ -0,0 +1,81 @@
+"""
+Near-duplicate detection for newly reported jobs.
+
+Every job stores a MinHash signature of the character trigrams of its
+normalized title and description. A new report is compared only against
+open jobs of the same property (and room/machine, when given) created within
+DUPLICATE_JOB_WINDOW_HOURS, which the partial ``job_open_dedupe_idx`` index
+serves directly; the similarity itself is computed in Python over that
+handful of candidates.
+"""
+import hashlib
+import random
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+SIGNATURE_SIZE = 32
+OPEN_STATUSES = ('pending', 'in_progress', 'on_hold')
+MAX_CANDIDATES = 50
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240601)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(SIGNATURE_SIZE)]
+_NON_WORD = re.compile(r'[\W_]+')
+
+
+def _shingles(text):
+    normalized = f" {_NON_WORD.sub(' ', text.lower()).strip()} "
+    if len(normalized) < 3:
+        return set()
+    return {normalized[i:i + 3] for i in range(len(normalized) - 2)}
+
+
+def text_signature(*parts):
+    """MinHash signature of the trigrams of ``parts``; empty for empty text."""
+    hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), 'big')
+        for shingle in _shingles(' '.join(part for part in parts if part))
+    ]
+    if not hashes:
+        return []
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def similarity(left, right):
+    """Estimated Jaccard similarity of two signatures."""
+    if not left or len(left) != len(right):
+        return 0.0
+    return sum(1 for x, y in zip(left, right) if x == y) / len(left)
+
+
+def find_duplicate(property_id, signature, room_id=None, machine_id=None, exclude_pk=None):
+    """The most similar open job above DUPLICATE_JOB_THRESHOLD, with its score, or (None, 0)."""
+    from .models import Job
+
+    if not signature:
+        return None, 0.0
+    window = timedelta(hours=getattr(settings, 'DUPLICATE_JOB_WINDOW_HOURS', 72))
+    candidates = Job.objects.filter(
+        property_id=property_id,
+        status__in=OPEN_STATUSES,
+        created_at__gte=timezone.now() - window,
+    )
+    if room_id is not None:
+        candidates = candidates.filter(room=room_id)
+    if machine_id:
+        candidates = candidates.filter(machine_id=machine_id)
+    if exclude_pk is not None:
+        candidates = candidates.exclude(pk=exclude_pk)
+
+    threshold = getattr(settings, 'DUPLICATE_JOB_THRESHOLD', 0.6)
+    best, best_score = None, 0.0
+    for pk, candidate_signature in candidates.order_by('-created_at').values_list('pk', 'text_signature')[:MAX_CANDIDATES]:
+        score = similarity(signature, candidate_signature)
+        if score >= threshold and score > best_score:
+            best, best_score = pk, score
+    if best is None:
+        return None, 0.0
+    return Job.objects.get(pk=best), best_score
@@ -0,0 +1,74 @@
+from django.db import connection, transaction
+from django.db.models import Max, Min
+from django.db.models.functions import Now
+
+from .models import Job, Property, Room
+
+
+def propagate_property_name(property):
+    """Copy a renamed property's name onto its jobs in one UPDATE that also bumps ``updated_at``."""
+    return Job.objects.filter(property=property).update(property_name=property.name, updated_at=Now())
+
+
+def propagate_room_name(room):
+    """Copy a renamed room's name onto its jobs in one UPDATE that also bumps ``updated_at``."""
+    return Job.objects.filter(room=room).update(room_name=room.name, updated_at=Now())
+
+
+def _repair_sql():
+    job = Job._meta
+    property_table = connection.ops.quote_name(Property._meta.db_table)
+    room_table = connection.ops.quote_name(Room._meta.db_table)
+    job_table = connection.ops.quote_name(job.db_table)
+    pk = connection.ops.quote_name(job.pk.column)
+    property_fk = connection.ops.quote_name(job.get_field('property').column)
+    room_fk = connection.ops.quote_name(job.get_field('room').column)
+    property_name = connection.ops.quote_name(job.get_field('property_name').column)
+    room_name = connection.ops.quote_name(job.get_field('room_name').column)
+    updated_at = connection.ops.quote_name(job.get_field('updated_at').column)
+    property_pk = connection.ops.quote_name(Property._meta.pk.column)
+    room_pk = connection.ops.quote_name(Room._meta.pk.column)
+
+    return [
+        f"""
+        UPDATE {job_table} AS j SET {property_name} = p.name, {updated_at} = CURRENT_TIMESTAMP
+        FROM {property_table} AS p
+        WHERE p.{property_pk} = j.{property_fk}
+          AND j.{pk} >= %s AND j.{pk} < %s
+          AND j.{property_name} IS DISTINCT FROM p.name
+        """,
+        f"""
+        UPDATE {job_table} AS j SET {room_name} = r.name, {updated_at} = CURRENT_TIMESTAMP
+        FROM {room_table} AS r
+        WHERE r.{room_pk} = j.{room_fk}
+          AND j.{pk} >= %s AND j.{pk} < %s
+          AND j.{room_name} IS DISTINCT FROM r.name
+        """,
+        f"""
+        UPDATE {job_table} SET {room_name} = NULL, {updated_at} = CURRENT_TIMESTAMP
+        WHERE {room_fk} IS NULL AND {room_name} IS NOT NULL
+          AND {pk} >= %s AND {pk} < %s
+        """,
+    ]
+
+
+def repair_job_denormalized_names(chunk_size=10000, progress=None):
+    """
+    Reconcile drifted property/room names on jobs, one primary key range at
+    a time so each chunk is a short transaction. Returns the rows changed.
+    """
+    bounds = Job.objects.aggregate(low=Min('pk'), high=Max('pk'))
+    if bounds['low'] is None:
+        return 0
+
+    statements = _repair_sql()
+    updated = 0
+    for start in range(bounds['low'], bounds['high'] + 1, chunk_size):
+        end = start + chunk_size
+        with transaction.atomic(), connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql, [start, end])
+                updated += cursor.rowcount
+        if progress:
+            progress(start, end, updated)
+    return updated
@@ -0,0 +1,128 @@
+"""
+Read-only fast path for list serialization.
+
+``compile_serializer`` turns a serializer class into a plan over a single
+``values()`` projection: plain model fields are read from their column,
+nested single-object serializers become joined column paths, and nested
+``many=True`` serializers over reverse foreign keys become one extra query
+per list, ordered by the child model's Meta.ordering or pk. Each value still
+goes through the same DRF field's ``to_representation``, so output matches
+the serializer exactly. Serializers with fields the plan cannot express
+(method fields, hyperlinks, dotted sources, ...) compile to None and keep
+using the regular serializer.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from rest_framework import serializers
+from rest_framework.relations import PrimaryKeyRelatedField
+
+_compiled = {}
+
+
+class _Unsupported(Exception):
+    pass
+
+
+class CompiledSerializer:
+    def __init__(self, model, columns, plan, children):
+        self.model = model
+        self.columns = columns
+        self.plan = plan
+        self.children = children
+
+    def project(self, queryset):
+        return queryset.values(*self.columns)
+
+    def render(self, rows):
+        rows = list(rows)
+        related = {}
+        if self.children and rows:
+            ids = [row['pk'] for row in rows]
+            for key, (rel, child) in self.children.items():
+                fk = f'{rel.field.name}__pk'
+                grouped = {pk: [] for pk in ids}
+                queryset = rel.related_model._default_manager.filter(**{f'{fk}__in': ids})
+                ordering = rel.related_model._meta.ordering or ['pk']
+                child_rows = queryset.order_by(*ordering).values(fk, *child.columns)
+                for child_row in child_rows:
+                    grouped[child_row[fk]].append(child_row)
+                related[key] = {pk: child.render(items) for pk, items in grouped.items()}
+        return [self._render_row(row, self.plan, related) for row in rows]
+
+    def _render_row(self, row, plan, related):
+        data = {}
+        for kind, key, column, extra in plan:
+            if kind == 'value':
+                value = row[column]
+                data[key] = None if value is None else extra.to_representation(value)
+            elif kind == 'nested':
+                data[key] = None if row[column] is None else self._render_row(row, extra, related)
+            else:
+                data[key] = related[key][row['pk']]
+        return data
+
+
+def _model_field(model, source):
+    try:
+        return model._meta.get_field(source)
+    except FieldDoesNotExist:
+        raise _Unsupported(source)
+
+
+def _compile_fields(serializer, model, prefix, columns, children, top_level):
+    plan = []
+    for key, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if field.source == '*' or '.' in field.source:
+            raise _Unsupported(key)
+
+        if isinstance(field, serializers.ListSerializer):
+            rel = _model_field(model, field.source)
+            if not top_level or not isinstance(rel, models.ManyToOneRel):
+                raise _Unsupported(key)
+            child_columns = []
+            child_plan = _compile_fields(field.child, rel.related_model, '', child_columns, {}, False)
+            children[key] = (rel, CompiledSerializer(rel.related_model, child_columns, child_plan, {}))
+            plan.append(('many', key, None, None))
+            continue
+
+        model_field = _model_field(model, field.source)
+        if isinstance(field, serializers.BaseSerializer):
+            if not (model_field.many_to_one or model_field.one_to_one) or model_field.auto_created:
+                raise _Unsupported(key)
+            path = f'{prefix}{field.source}__'
+            columns.append(f'{path}pk')
+            nested = _compile_fields(field, model_field.related_model, path, columns, children, False)
+            plan.append(('nested', key, f'{path}pk', nested))
+        elif isinstance(field, PrimaryKeyRelatedField):
+            if field.pk_field is not None or not model_field.many_to_one:
+                raise _Unsupported(key)
+            columns.append(f'{prefix}{field.source}__pk')
+            plan.append(('value', key, f'{prefix}{field.source}__pk', serializers.ReadOnlyField()))
+        elif isinstance(field, (serializers.SerializerMethodField, serializers.RelatedField, serializers.FileField)):
+            raise _Unsupported(key)
+        elif not model_field.concrete or model_field.is_relation:
+            raise _Unsupported(key)
+        else:
+            column = 'pk' if model_field.primary_key and not prefix else f'{prefix}{field.source}'
+            columns.append(column)
+            plan.append(('value', key, column, field))
+    return plan
+
+
+def compile_serializer(serializer_class):
+    """The compiled plan for a ModelSerializer class, or None if it cannot be compiled."""
+    if serializer_class not in _compiled:
+        compiled = None
+        if issubclass(serializer_class, serializers.ModelSerializer):
+            model = serializer_class.Meta.model
+            columns, children = ['pk'], {}
+            try:
+                plan = _compile_fields(serializer_class(), model, '', columns, children, True)
+            except _Unsupported:
+                pass
+            else:
+                compiled = CompiledSerializer(model, list(dict.fromkeys(columns)), plan, children)
+        _compiled[serializer_class] = compiled
+    return _compiled[serializer_class]
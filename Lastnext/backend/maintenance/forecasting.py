@@ -0,0 +1,247 @@
+"""
+Duration and cost forecasts from completed job history.
+
+``recompute_forecasts`` reads the completed jobs of the last
+FORECAST_HISTORY_DAYS with one streamed query into NumPy arrays and computes,
+for every (machine, type), (property, type) and type group at once, the
+10th/50th/90th percentiles of actual hours and cost plus an hours trend (a
+least-squares slope over each group's 10th-90th percentile band, in hours per
+30 days). Everything is done with one sort and a few ``bincount`` passes, so
+the cost is dominated by reading the rows. Results replace the contents of
+``JobDurationForecast``.
+
+New jobs without an estimate take the median of the most specific group
+with enough history, and ``capacity_plan`` sums those forecasts against the
+technician hours available per property and day.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections, transaction
+from django.db.models import Case, Count, FloatField, Q, Value, When
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
+
+from .models import Job, JobDurationForecast, UserProperty
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+OPEN_STATUSES = ('pending', 'in_progress', 'on_hold')
+QUANTILES = (0.1, 0.5, 0.9)
+FETCH_SIZE = 100_000
+MAX_ESTIMATE = Decimal('999.99')
+
+
+def _load_history(since):
+    queryset = Job.objects.filter(status='completed', completed_date__gte=since).filter(
+        Q(actual_hours__gt=0) | Q(cost__isnull=False)
+    ).values_list(
+        Coalesce('machine_id', Value('')), 'property_id', 'type', 'completed_date',
+        # Rows kept only for their cost report no hours: NULL, not 0.
+        Case(When(actual_hours__gt=0, then=Cast('actual_hours', FloatField())), default=None,
+             output_field=FloatField()),
+        Cast('cost', FloatField()),
+    )
+    sql, params = queryset.query.sql_with_params()
+    columns = [[] for _ in range(6)]
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        while rows := cursor.fetchmany(FETCH_SIZE):
+            for column, values in zip(columns, zip(*rows)):
+                column.extend(values)
+    machines, properties, types, completed, hours, costs = columns
+    return (
+        np.array(machines, dtype=object),
+        np.array(properties, dtype=np.int64),
+        np.array(types, dtype=object),
+        (np.array(completed, dtype='datetime64[D]') - np.datetime64(since, 'D')).astype(np.float64),
+        np.array(hours, dtype=np.float64),
+        np.array(costs, dtype=np.float64),
+    )
+
+
+def group_statistics(codes, values, days):
+    """Per-group sample count, QUANTILES and trend of ``values`` (NaN ignored), grouped by integer ``codes``."""
+    valid = ~np.isnan(values)
+    codes, values, days = codes[valid], values[valid], days[valid]
+    order = np.lexsort((values, codes))
+    codes, values, days = codes[order], values[order], days[order]
+    groups, starts, counts = np.unique(codes, return_index=True, return_counts=True)
+    stats = {'groups': groups, 'count': counts}
+    last = starts + counts - 1
+    for q in QUANTILES:
+        position = starts + q * (counts - 1)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.minimum(lower + 1, last)
+        stats[q] = values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+    index = np.repeat(np.arange(len(groups)), counts)
+    band = (values >= stats[0.1][index]) & (values <= stats[0.9][index])
+    index, x, y = index[band], days[band], values[band]
+    size = len(groups)
+    n = np.bincount(index, minlength=size).astype(np.float64)
+    sx = np.bincount(index, x, size)
+    sy = np.bincount(index, y, size)
+    sxx = np.bincount(index, x * x, size)
+    sxy = np.bincount(index, x * y, size)
+    denominator = n * sxx - sx * sx
+    slope = np.divide(n * sxy - sx * sy, denominator, out=np.zeros(size), where=denominator > 0)
+    stats['trend'] = slope * 30
+    return stats
+
+
+def _groupings(machines, properties, types):
+    type_values, type_codes = np.unique(types, return_inverse=True)
+    width = len(type_values)
+    machine_values, machine_codes = np.unique(machines, return_inverse=True)
+    property_values, property_codes = np.unique(properties, return_inverse=True)
+    has_machine = machines != ''
+    return type_values, width, (
+        ('machine', machine_values, machine_codes * width + type_codes, has_machine),
+        ('property', property_values, property_codes * width + type_codes, None),
+        ('type', np.array([''], dtype=object), type_codes, None),
+    )
+
+
+def _round(value):
+    return round(float(value), 2)
+
+
+def recompute_forecasts(now=None):
+    """Rebuild ``JobDurationForecast`` from history; returns the number of groups stored."""
+    if np is None:
+        raise ImproperlyConfigured('Job forecasting requires the numpy package')
+    now = now or timezone.now()
+    since = now.date() - timedelta(days=getattr(settings, 'FORECAST_HISTORY_DAYS', 730))
+    min_samples = getattr(settings, 'FORECAST_MIN_SAMPLES', 5)
+    machines, properties, types, days, hours, costs = _load_history(since)
+
+    forecasts = {}
+    if len(types):
+        type_values, width, groupings = _groupings(machines, properties, types)
+        for level, key_values, codes, rows in groupings:
+            for measure, values in (('hours', hours), ('cost', costs)):
+                if rows is not None:
+                    values = np.where(rows, values, np.nan)
+                stats = group_statistics(codes, values, days)
+                enough = stats['count'] >= min_samples
+                for i in np.flatnonzero(enough):
+                    group = int(stats['groups'][i])
+                    key = (level, str(key_values[group // width]), type_values[group % width])
+                    forecast = forecasts.setdefault(key, JobDurationForecast(
+                        level=level, key=key[1], type=key[2], computed_at=now,
+                    ))
+                    if measure == 'hours':
+                        forecast.sample_size = int(stats['count'][i])
+                        forecast.hours_p10 = _round(stats[0.1][i])
+                        forecast.hours_median = _round(stats[0.5][i])
+                        forecast.hours_p90 = _round(stats[0.9][i])
+                        forecast.hours_trend = _round(stats['trend'][i])
+                    else:
+                        forecast.cost_samples = int(stats['count'][i])
+                        forecast.cost_median = _round(stats[0.5][i])
+                        forecast.cost_p90 = _round(stats[0.9][i])
+
+    with transaction.atomic():
+        JobDurationForecast.objects.all().delete()
+        JobDurationForecast.objects.bulk_create(forecasts.values(), batch_size=5000)
+    return len(forecasts)
+
+
+def forecasts_for(keys):
+    """The most specific hours forecast for each (machine_id, property_id, type) key, or None."""
+    keys = set(keys)
+    if not keys:
+        return {}
+    machine_ids = {machine_id for machine_id, _, _ in keys if machine_id}
+    property_keys = {str(property_id) for _, property_id, _ in keys if property_id is not None}
+    rows = JobDurationForecast.objects.filter(
+        Q(level='machine', key__in=machine_ids) | Q(level='property', key__in=property_keys) | Q(level='type'),
+        type__in={job_type for _, _, job_type in keys},
+        hours_median__isnull=False,
+    )
+    found = {(row.level, row.key, row.type): row for row in rows}
+    result = {}
+    for machine_id, property_id, job_type in keys:
+        candidates = (
+            ('machine', machine_id, job_type),
+            ('property', str(property_id), job_type),
+            ('type', '', job_type),
+        )
+        result[(machine_id, property_id, job_type)] = next(
+            (found[candidate] for candidate in candidates if candidate in found), None
+        )
+    return result
+
+
+def estimated_hours(forecast):
+    """``Job.estimated_hours`` value for a forecast: its median."""
+    if forecast is None:
+        return None
+    return min(Decimal(f'{forecast.hours_median:.2f}'), MAX_ESTIMATE)
+
+
+def forecast_hours(machine_id, property_id, job_type):
+    key = (machine_id, property_id, job_type)
+    return estimated_hours(forecasts_for([key])[key])
+
+
+def fill_estimated_hours(jobs):
+    """Fill in ``estimated_hours`` on unsaved jobs that have none, with one query."""
+    missing = [job for job in jobs if job.estimated_hours is None]
+    forecasts = forecasts_for((job.machine_id, job.property_id, job.type) for job in missing)
+    for job in missing:
+        job.estimated_hours = estimated_hours(forecasts[(job.machine_id, job.property_id, job.type)])
+
+
+def capacity_plan(start, end, property_ids=None):
+    """Forecast work against technician hours per property and day in [start, end]."""
+    jobs = Job.objects.filter(status__in=OPEN_STATUSES, scheduled_date__range=(start, end))
+    technicians = UserProperty.objects.filter(
+        user__is_active=True, user__profile__role='technician', user__profile__is_active=True
+    )
+    if property_ids is not None:
+        jobs = jobs.filter(property_id__in=property_ids)
+        technicians = technicians.filter(property_id__in=property_ids)
+    rows = list(jobs.values_list('property_id', 'scheduled_date', 'machine_id', 'type', 'estimated_hours'))
+    forecasts = forecasts_for((machine_id, pid, job_type) for pid, _, machine_id, job_type, _ in rows)
+    staff = dict(technicians.values('property_id').annotate(count=Count('user_id', distinct=True)).values_list(
+        'property_id', 'count'
+    ))
+
+    demand = defaultdict(lambda: {'jobs': 0, 'unestimated_jobs': 0, 'planned_hours': 0.0, 'planned_hours_p90': 0.0})
+    for pid, day, machine_id, job_type, estimate in rows:
+        forecast = forecasts[(machine_id, pid, job_type)]
+        expected = float(estimate) if estimate is not None else forecast and forecast.hours_median
+        totals = demand[(pid, day)]
+        totals['jobs'] += 1
+        if expected is None:
+            totals['unestimated_jobs'] += 1
+            continue
+        high = forecast.hours_p90 if forecast is not None and forecast.hours_p90 is not None else expected
+        totals['planned_hours'] += expected
+        totals['planned_hours_p90'] += max(expected, high)
+
+    hours_per_day = getattr(settings, 'CAPACITY_HOURS_PER_DAY', 8)
+    days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+    plan = []
+    for pid in sorted({pid for pid, _ in demand} | set(staff)):
+        schedule = []
+        for day in days:
+            totals = demand.get((pid, day)) or demand.default_factory()
+            schedule.append({
+                'date': day,
+                'jobs': totals['jobs'],
+                'unestimated_jobs': totals['unestimated_jobs'],
+                'planned_hours': round(totals['planned_hours'], 2),
+                'planned_hours_p90': round(totals['planned_hours_p90'], 2),
+                'available_hours': staff.get(pid, 0) * hours_per_day,
+            })
+        plan.append({'property_id': pid, 'technicians': staff.get(pid, 0), 'days': schedule})
+    return plan
@@ -0,0 +1,66 @@
+"""
+Property -> room -> machine hierarchy for pickers.
+
+The tree is three flat arrays linked by parent ids, built with one query per
+level and cached under a per-property version that is bumped whenever the
+property or one of its rooms or machines changes. The version doubles as the
+ETag, so revalidation needs no database access at all.
+
+The version is only bumped once the change commits, and the tree is always
+read from the primary: a tree built from uncommitted state or a lagging
+replica would otherwise be cached under the new version until the next change.
+"""
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .caching import bump_cache_version, cache_version
+from .db_router import PRIMARY_DB_ALIAS
+from .models import Machine, Property, Room
+
+
+def _namespace(property_id):
+    return f'property-tree:{property_id}'
+
+
+def invalidate_tree(property_id):
+    if property_id is not None:
+        transaction.on_commit(partial(bump_cache_version, _namespace(property_id)))
+
+
+def tree_etag(property_id):
+    return f'"tree-{property_id}-{cache_version(_namespace(property_id))}"'
+
+
+def build_property_tree(property_id):
+    prop = Property.objects.using(PRIMARY_DB_ALIAS).filter(pk=property_id).values('id', 'property_id', 'name', 'is_active').first()
+    if prop is None:
+        return None
+    rooms = Room.objects.using(PRIMARY_DB_ALIAS).filter(property_id=property_id).order_by('name', 'pk').values(
+        'id', 'room_id', 'name', 'floor', 'is_active'
+    )
+    machines = Machine.objects.using(PRIMARY_DB_ALIAS).filter(property_id=property_id).order_by('name', 'pk').values(
+        'id', 'machine_id', 'name', 'status', 'room_id', 'is_active'
+    )
+    return {
+        'property': prop,
+        'rooms': [{**room, 'property': property_id} for room in rooms],
+        'machines': [
+            {**machine, 'room': machine.pop('room_id'), 'property': property_id}
+            for machine in machines
+        ],
+    }
+
+
+def property_tree(property_id):
+    """(tree, etag) for a property; tree is None if the property does not exist."""
+    etag = tree_etag(property_id)
+    key = f'{_namespace(property_id)}:{etag}'
+    tree = cache.get(key)
+    if tree is None:
+        tree = build_property_tree(property_id)
+        if tree is not None:
+            cache.set(key, tree, getattr(settings, 'PROPERTY_TREE_CACHE_SECONDS', 3600))
+    return tree, etag
@@ -0,0 +1,174 @@
+"""
+Resized variants of uploaded images.
+
+Each original gets a ``thumbnail`` and a ``medium`` JPEG next to it in
+storage (``<name>.<variant>.jpg``). Variants are generated in a small thread
+pool after the upload's transaction commits, never on the request path.
+Variants are served only through ``ImageView`` with signed URLs that expire
+after one to two IMAGE_URL_SECONDS windows (a week by default). Uploads get
+unique names, so a variant's bytes never change: responses are cached by the
+client as ``immutable`` for as long as the URL is valid, and marked
+``private`` so shared caches never keep them. The signed URL is the only
+credential an ``<img>`` request carries, so its lifetime is also how long a
+leaked link keeps working; that, not caching, is what the window bounds.
+"""
+import io
+import logging
+import posixpath
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core import signing
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.urls import reverse
+from django.utils.crypto import constant_time_compare
+from django.utils.http import urlencode
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+VARIANTS = {
+    'thumbnail': 200,
+    'medium': 800,
+}
+
+IMAGE_PREFIXES = ('profile_images/', 'maintenance_images/')
+
+SIGNING_SALT = 'maintenance.images'
+
+_executor = None
+
+
+def variant_name(name, variant):
+    return f'{name}.{variant}.jpg'
+
+
+def original_name(name):
+    """The original a variant name was derived from, or None if it is not a variant."""
+    for variant in VARIANTS:
+        suffix = f'.{variant}.jpg'
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return None
+
+
+def generate_variants(name, overwrite=False):
+    """Write the missing variants of ``name``; returns how many were written."""
+    if Image is None:
+        return 0
+    pending = {
+        variant: width for variant, width in VARIANTS.items()
+        if overwrite or not default_storage.exists(variant_name(name, variant))
+    }
+    if not pending:
+        return 0
+
+    with default_storage.open(name, 'rb') as source:
+        image = ImageOps.exif_transpose(Image.open(source))
+        image.load()
+    if image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+
+    for variant, width in pending.items():
+        resized = image.copy()
+        resized.thumbnail((width, width * 4), Image.LANCZOS)
+        output = io.BytesIO()
+        resized.save(output, 'JPEG', quality=82, optimize=True, progressive=True)
+        path = variant_name(name, variant)
+        if overwrite and default_storage.exists(path):
+            default_storage.delete(path)
+        default_storage.save(path, ContentFile(output.getvalue()))
+    return len(pending)
+
+
+def delete_variants(name):
+    for variant in VARIANTS:
+        path = variant_name(name, variant)
+        if default_storage.exists(path):
+            default_storage.delete(path)
+
+
+def _run(func, name):
+    try:
+        func(name)
+    except Exception:
+        logger.exception('Image variant task failed for %s', name)
+
+
+def _submit(func, name):
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'IMAGE_VARIANT_WORKERS', 2),
+            thread_name_prefix='image-variants',
+        )
+    _executor.submit(_run, func, name)
+
+
+def image_changed(previous, current):
+    """Queue variant work for an image field that moved from ``previous`` to ``current``."""
+    if previous == current:
+        return
+    if previous:
+        transaction.on_commit(lambda: _submit(delete_variants, previous))
+    if current:
+        transaction.on_commit(lambda: _submit(generate_variants, current))
+
+
+def _signature(name, expires):
+    return signing.Signer(salt=SIGNING_SALT).signature(f'{name}:{expires}')
+
+
+def signed_image_url(name):
+    """URL of a variant, valid until the end of the next IMAGE_URL_SECONDS window."""
+    period = getattr(settings, 'IMAGE_URL_SECONDS', 7 * 24 * 3600)
+    expires = (int(time.time()) // period + 2) * period
+    query = urlencode({'expires': expires, 'signature': _signature(name, expires)})
+    return f"{reverse('image', kwargs={'name': name})}?{query}"
+
+
+def signed_seconds_left(name, expires, signature):
+    """Seconds a variant URL stays valid, or None if it is forged, expired or not a variant."""
+    if not name.startswith(IMAGE_PREFIXES) or '..' in name.split('/') or original_name(name) is None:
+        return None
+    try:
+        expires = int(expires)
+    except (TypeError, ValueError):
+        return None
+    left = expires - int(time.time())
+    if left <= 0 or not constant_time_compare(signature or '', _signature(name, expires)):
+        return None
+    return left
+
+
+def _absolute(url, request=None):
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def image_url(field, request=None):
+    """URL of the original image, or None without one."""
+    return _absolute(field.url, request) if field else None
+
+
+def image_payload(field, request=None):
+    """Original URL plus variant URLs with their widths, for serializers."""
+    if not field:
+        return None
+    return {
+        'url': image_url(field, request),
+        'name': posixpath.basename(field.name),
+        'variants': {
+            variant: {
+                'url': _absolute(signed_image_url(variant_name(field.name, variant)), request),
+                'width': width,
+            }
+            for variant, width in VARIANTS.items()
+        },
+    }
@@ -0,0 +1,112 @@
+"""
+Keeps ``Machine.maintenance_count``, ``last_maintenance_date`` and
+``next_maintenance_date`` in step with the machine's preventive maintenance.
+
+Completing a PM increments the counter with F() and only moves
+``last_maintenance_date`` forward; other changes recompute the affected
+machines with correlated subqueries in a single UPDATE. Every UPDATE also
+touches ``updated_at`` so delta sync picks the new values up.
+"""
+from django.db import transaction
+from django.db.models import (
+    Case, Count, F, IntegerField, Max, Min, OuterRef, Q, Subquery, Value, When
+)
+from django.db.models.functions import Coalesce, Now
+
+from .models import Machine, PreventiveMaintenance
+
+OPEN_STATUSES = ('pending', 'overdue')
+
+
+def _linked_pms():
+    return PreventiveMaintenance.objects.filter(machines=OuterRef('pk')).order_by().values('machines')
+
+
+def _next_date():
+    return Subquery(
+        _linked_pms().filter(status__in=OPEN_STATUSES)
+        .annotate(next_date=Min('scheduled_date')).values('next_date')[:1]
+    )
+
+
+def _last_date():
+    return Subquery(
+        _linked_pms().filter(status='completed')
+        .annotate(last_date=Max('completed_date')).values('last_date')[:1]
+    )
+
+
+def _completed_count():
+    return Coalesce(
+        Subquery(
+            _linked_pms().filter(status='completed')
+            .annotate(total=Count('pk')).values('total')[:1],
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+def _recompute(machines):
+    return machines.update(
+        maintenance_count=_completed_count(),
+        last_maintenance_date=_last_date(),
+        next_maintenance_date=_next_date(),
+        updated_at=Now(),
+    )
+
+
+def refresh_machines(machine_ids):
+    """Recompute all three fields for the given machines from their PMs."""
+    return _recompute(Machine.objects.filter(pk__in=machine_ids))
+
+
+def pm_changed(pm, previous_status, previous_scheduled_date, previous_completed_date):
+    was_completed = previous_status == 'completed'
+    is_completed = pm.status == 'completed'
+    rescheduled = previous_scheduled_date != pm.scheduled_date
+    if was_completed == is_completed and not rescheduled and previous_completed_date == pm.completed_date:
+        return
+
+    machines = Machine.objects.filter(maintenance_tasks=pm)
+    with transaction.atomic():
+        if is_completed and not was_completed:
+            completed_on = pm.completed_date or pm.scheduled_date
+            machines.update(
+                maintenance_count=F('maintenance_count') + 1,
+                last_maintenance_date=Case(
+                    When(
+                        Q(last_maintenance_date__isnull=True) | Q(last_maintenance_date__lt=completed_on),
+                        then=Value(completed_on),
+                    ),
+                    default=F('last_maintenance_date'),
+                ),
+                next_maintenance_date=_next_date(),
+                updated_at=Now(),
+            )
+        elif was_completed and not is_completed:
+            machines.update(
+                maintenance_count=F('maintenance_count') - 1,
+                last_maintenance_date=_last_date(),
+                next_maintenance_date=_next_date(),
+                updated_at=Now(),
+            )
+        elif is_completed:
+            machines.update(last_maintenance_date=_last_date(), updated_at=Now())
+        else:
+            machines.update(next_maintenance_date=_next_date(), updated_at=Now())
+
+
+def recompute_all_machines(chunk_size=5000, progress=None):
+    """Recompute every machine in primary-key chunks; returns rows updated."""
+    bounds = Machine.objects.aggregate(low=Min('pk'), high=Max('pk'))
+    if bounds['low'] is None:
+        return 0
+    updated = 0
+    for start in range(bounds['low'], bounds['high'] + 1, chunk_size):
+        end = start + chunk_size
+        with transaction.atomic():
+            updated += _recompute(Machine.objects.filter(pk__gte=start, pk__lt=end))
+        if progress:
+            progress(start, end, updated)
+    return updated
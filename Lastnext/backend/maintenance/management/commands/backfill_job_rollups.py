@@ -0,0 +1,29 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from maintenance.rollups import rebuild_job_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily job cost/labor rollups from the job table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=date.fromisoformat, help='First completion date (YYYY-MM-DD)')
+        parser.add_argument('--end', type=date.fromisoformat, help='Last completion date (YYYY-MM-DD)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        verbosity = options['verbosity']
+
+        def progress(start, end, written):
+            if verbosity > 1:
+                self.stdout.write(f'{start} - {end}: {written} rollup rows written so far')
+
+        written = rebuild_job_rollups(
+            start=options['start'],
+            end=options['end'],
+            batch_size=options['batch_size'],
+            progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} rollup rows'))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from maintenance.dedupe import OPEN_STATUSES, text_signature
+from maintenance.models import Job
+
+
+class Command(BaseCommand):
+    help = 'Compute duplicate-detection signatures for jobs that do not have one'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--all-statuses', action='store_true',
+                            help='Include closed jobs, which duplicate detection never compares against')
+
+    def handle(self, *args, **options):
+        verbosity = options['verbosity']
+        jobs = Job.objects.filter(text_signature=[]).only('pk', 'title', 'description', 'text_signature')
+        if not options['all_statuses']:
+            jobs = jobs.filter(status__in=OPEN_STATUSES)
+
+        updated, batch = 0, []
+        for job in jobs.order_by('pk').iterator(chunk_size=options['batch_size']):
+            job.text_signature = text_signature(job.title, job.description)
+            if job.text_signature:
+                batch.append(job)
+            if len(batch) >= options['batch_size']:
+                Job.objects.bulk_update(batch, ['text_signature'])
+                updated += len(batch)
+                batch = []
+                if verbosity > 1:
+                    self.stdout.write(f'{updated} signatures written so far')
+        if batch:
+            Job.objects.bulk_update(batch, ['text_signature'])
+            updated += len(batch)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {updated} job signatures'))
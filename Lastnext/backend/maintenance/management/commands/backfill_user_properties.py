@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from maintenance.access import invalidate_user_properties
+from maintenance.models import Job, UserProperty
+
+
+class Command(BaseCommand):
+    help = 'Create property memberships for users from the jobs they created or are assigned'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        pairs = set()
+        for user_field in ('created_by_id', 'assigned_to_id'):
+            pairs.update(
+                Job.objects.filter(**{f'{user_field}__isnull': False})
+                .values_list(user_field, 'property_id').distinct()
+            )
+        existing = set(UserProperty.objects.values_list('user_id', 'property_id'))
+        missing = sorted(pairs - existing)
+        UserProperty.objects.bulk_create(
+            [UserProperty(user_id=user_id, property_id=property_id) for user_id, property_id in missing],
+            batch_size=options['batch_size'],
+            ignore_conflicts=True,
+        )
+        for user_id in {user_id for user_id, _ in missing}:
+            invalidate_user_properties(user_id)
+        self.stdout.write(self.style.SUCCESS(f'Created {len(missing)} property memberships'))
@@ -0,0 +1,87 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from maintenance.fastpath import compile_serializer
+from maintenance.renderers import FastJSONRenderer
+from maintenance.models import Job, Machine, Room
+from maintenance.serializers import JobSerializer, MachineSerializer, RoomSerializer
+
+TARGETS = {
+    'job': (Job, JobSerializer),
+    'machine': (Machine, MachineSerializer),
+    'room': (Room, RoomSerializer),
+}
+
+
+class Command(BaseCommand):
+    help = 'Compare list serialization and JSON rendering throughput of the regular and fast paths'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', choices=list(TARGETS), action='append', dest='models')
+        parser.add_argument('--rows', type=int, default=500)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def _time(self, func, repeat):
+        best, output = None, None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            output = func()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, output
+
+    def _peak_memory(self, func):
+        tracemalloc.start()
+        try:
+            func()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def handle(self, *args, **options):
+        renderer = JSONRenderer()
+        fast_renderer = FastJSONRenderer()
+        for name in options['models'] or list(TARGETS):
+            model, serializer_class = TARGETS[name]
+            compiled = compile_serializer(serializer_class)
+            if compiled is None:
+                raise CommandError(f'{serializer_class.__name__} cannot be compiled')
+            queryset = model.objects.order_by('pk')[:options['rows']]
+
+            slow, slow_output = self._time(
+                lambda: renderer.render(serializer_class(queryset.all(), many=True).data),
+                options['repeat'],
+            )
+            fast, fast_output = self._time(
+                lambda: renderer.render(compiled.render(compiled.project(queryset.all()))),
+                options['repeat'],
+            )
+            if slow_output != fast_output:
+                raise CommandError(f'{name}: fast path output differs from {serializer_class.__name__}')
+
+            rows = len(queryset)
+            if not rows:
+                self.stdout.write(f'{name}: no rows')
+                continue
+            self.stdout.write(
+                f'{name}: {rows} rows, serializer {slow * 1000:.1f} ms ({rows / slow:.0f} rows/s), '
+                f'fast path {fast * 1000:.1f} ms ({rows / fast:.0f} rows/s), {slow / fast:.1f}x'
+            )
+
+            data = compiled.render(compiled.project(queryset.all()))
+            stock, stock_output = self._time(lambda: renderer.render(data), options['repeat'])
+            rendered, rendered_output = self._time(lambda: fast_renderer.render(data), options['repeat'])
+            streamed_output = b''.join(fast_renderer.iter_render(data))
+            if not stock_output == rendered_output == streamed_output:
+                raise CommandError(f'{name}: FastJSONRenderer output differs from JSONRenderer')
+            stock_peak = self._peak_memory(lambda: renderer.render(data))
+            stream_peak = self._peak_memory(lambda: max(len(chunk) for chunk in fast_renderer.iter_render(data)))
+            self.stdout.write(
+                f'{name}: render stock {stock * 1000:.1f} ms, fast {rendered * 1000:.1f} ms '
+                f'({stock / rendered:.1f}x); peak render memory stock {stock_peak / 1024:.0f} KiB, '
+                f'streamed {stream_peak / 1024:.0f} KiB'
+            )
+        self.stdout.write(self.style.SUCCESS('Outputs are byte-identical on the sampled rows'))
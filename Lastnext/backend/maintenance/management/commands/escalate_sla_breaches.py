@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from maintenance.sla import backfill_due_dates, escalate_breached
+
+
+class Command(BaseCommand):
+    help = 'Raise the priority of open jobs past their SLA deadline; meant to run periodically'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, help='Jobs escalated per run (default SLA_ESCALATION_BATCH)')
+        parser.add_argument('--backfill', action='store_true',
+                            help='First set deadlines on open jobs that have none, e.g. after adding a policy')
+
+    def handle(self, *args, **options):
+        if options['backfill']:
+            self.stdout.write(f'Set deadlines on {backfill_due_dates()} jobs')
+        escalated = escalate_breached(limit=options['limit'])
+        if options['verbosity'] > 1 and escalated:
+            self.stdout.write(f"Escalated: {', '.join(map(str, escalated))}")
+        self.stdout.write(self.style.SUCCESS(f'Escalated {len(escalated)} jobs past their SLA deadline'))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from maintenance.images import generate_variants
+from maintenance.models import PreventiveMaintenance, UserProfile
+
+IMAGE_FIELDS = (
+    (UserProfile, 'profile_image'),
+    (PreventiveMaintenance, 'before_image'),
+    (PreventiveMaintenance, 'after_image'),
+)
+
+
+class Command(BaseCommand):
+    help = 'Generate missing thumbnail/medium variants for profile and PM images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--overwrite', action='store_true', help='Regenerate existing variants')
+
+    def handle(self, *args, **options):
+        verbosity = options['verbosity']
+        written = failed = 0
+        for model, field in IMAGE_FIELDS:
+            names = (
+                model.objects.exclude(**{f'{field}__isnull': True}).exclude(**{field: ''})
+                .values_list(field, flat=True).iterator()
+            )
+            for name in names:
+                try:
+                    count = generate_variants(name, overwrite=options['overwrite'])
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f'{name}: {exc}')
+                    continue
+                written += count
+                if verbosity > 1 and count:
+                    self.stdout.write(f'{name}: {count} variants written')
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} variants ({failed} images failed)'))
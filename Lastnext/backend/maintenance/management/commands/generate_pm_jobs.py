@@ -0,0 +1,35 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from maintenance.checklists import generate_pm_jobs
+from maintenance.models import User
+
+
+class Command(BaseCommand):
+    help = 'Create jobs, with their checklists, for open preventive maintenance occurring in a date window'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=date.fromisoformat, required=True, help='YYYY-MM-DD')
+        parser.add_argument('--end', type=date.fromisoformat, required=True, help='YYYY-MM-DD')
+        parser.add_argument('--user', required=True, help='Email of the user recorded as creator')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        if options['end'] < options['start']:
+            raise CommandError('--end must not be before --start')
+        try:
+            user = User.objects.get(email=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user with email {options['user']}")
+        verbosity = options['verbosity']
+
+        def progress(created):
+            if verbosity > 1:
+                self.stdout.write(f'{created} jobs created so far')
+
+        created = generate_pm_jobs(
+            options['start'], options['end'], user,
+            batch_size=options['batch_size'], progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(f'Created {created} preventive maintenance jobs'))
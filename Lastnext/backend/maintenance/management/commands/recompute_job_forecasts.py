@@ -0,0 +1,16 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from maintenance.forecasting import recompute_forecasts
+
+
+class Command(BaseCommand):
+    help = 'Recompute job duration and cost forecasts from completed job history'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        groups = recompute_forecasts()
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored forecasts for {groups} groups in {time.perf_counter() - started:.1f}s'
+        ))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from maintenance.machine_counters import recompute_all_machines
+
+
+class Command(BaseCommand):
+    help = 'Recompute machine maintenance counts and last/next maintenance dates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        verbosity = options['verbosity']
+
+        def progress(start, end, updated):
+            if verbosity > 1:
+                self.stdout.write(f'ids {start}-{end - 1}: {updated} machines updated so far')
+
+        updated = recompute_all_machines(chunk_size=options['chunk_size'], progress=progress)
+        self.stdout.write(self.style.SUCCESS(f'Recomputed {updated} machines'))
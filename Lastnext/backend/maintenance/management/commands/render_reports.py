@@ -0,0 +1,35 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from maintenance.models import Property
+from maintenance.reports import REPORT_KINDS, render_reports
+
+
+class Command(BaseCommand):
+    help = 'Render PDF reports for many properties at once, reusing cached output'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kind', choices=list(REPORT_KINDS), default='maintenance')
+        parser.add_argument('--start', type=date.fromisoformat, required=True, help='YYYY-MM-DD')
+        parser.add_argument('--end', type=date.fromisoformat, required=True, help='YYYY-MM-DD')
+        parser.add_argument('--property', type=int, action='append', dest='properties',
+                            help='Property id; repeat for several. Defaults to all properties.')
+
+    def handle(self, *args, **options):
+        if options['end'] < options['start']:
+            raise CommandError('--end must not be before --start')
+        verbosity = options['verbosity']
+        property_ids = options['properties'] or list(Property.objects.order_by('pk').values_list('pk', flat=True))
+        rendered = 0
+
+        def progress(property_id, path, cached):
+            nonlocal rendered
+            rendered += not cached
+            if verbosity > 1:
+                self.stdout.write(f"{property_id}: {path}{' (cached)' if cached else ''}")
+
+        paths = render_reports(options['kind'], property_ids, options['start'], options['end'], progress=progress)
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(paths)} reports ready, {rendered} rendered, {len(paths) - rendered} from cache'
+        ))
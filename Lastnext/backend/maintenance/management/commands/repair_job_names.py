@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from maintenance.denormalization import repair_job_denormalized_names
+
+
+class Command(BaseCommand):
+    help = 'Reconcile the denormalized property/room names stored on jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        verbosity = options['verbosity']
+
+        def progress(start, end, updated):
+            if verbosity > 1:
+                self.stdout.write(f'ids {start}-{end - 1}: {updated} rows updated so far')
+
+        updated = repair_job_denormalized_names(
+            chunk_size=options['chunk_size'],
+            progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(f'Repaired {updated} job rows'))
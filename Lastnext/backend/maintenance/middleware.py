@@ -0,0 +1,53 @@
+"""
+Per-request database write accounting and audit trail buffering.
+
+Add ``'maintenance.middleware.WriteStatsMiddleware'`` to MIDDLEWARE to get
+X-DB-Statements-Written, X-DB-Rows-Written and X-DB-Bytes-Written headers
+on every response and a debug log line for requests that wrote anything.
+
+Add ``'maintenance.middleware.AuditTrailMiddleware'`` to write the job
+history a request produces with one INSERT once it is done (see
+``maintenance.audit``).
+"""
+import logging
+
+from django.db import connections
+
+from .audit import audit_scope
+from .db_router import PRIMARY_DB_ALIAS
+from .tracking import WriteStats
+
+logger = logging.getLogger(__name__)
+
+
+class WriteStatsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = WriteStats()
+        with connections[PRIMARY_DB_ALIAS].execute_wrapper(stats):
+            response = self.get_response(request)
+        response['X-DB-Statements-Written'] = str(stats.statements)
+        response['X-DB-Rows-Written'] = str(stats.rows)
+        response['X-DB-Bytes-Written'] = str(stats.bytes)
+        if stats.statements:
+            logger.debug(
+                '%s %s wrote %d rows (%d bytes) in %d statements',
+                request.method, request.path, stats.rows, stats.bytes, stats.statements,
+            )
+        return response
+
+
+class AuditTrailMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with audit_scope() as buffer:
+            response = self.get_response(request)
+            # DRF copies the user it authenticated onto the underlying request.
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                buffer.user = user
+        return response
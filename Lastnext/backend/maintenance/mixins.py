@@ -0,0 +1,188 @@
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from .access import property_id_from_data, property_id_of, room_property_id_from_data, user_property_ids
+from .admission import admission_class
+from .batch import remember
+from .fastpath import compile_serializer
+from .renderers import FastJSONRenderer
+from .db_router import (
+    end_replica_reads, is_pinned_to_primary, pin_to_primary, start_replica_reads
+)
+from .sync import delta_sync_response
+
+
+class ReplicaReadMixin:
+    """
+    Serve safe-method requests from a read replica once authentication has
+    run, unless the caller wrote recently and is pinned to the primary.
+    """
+    replica_reads = True
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._replica_token = None
+        if (
+            self.replica_reads
+            and request.method in SAFE_METHODS
+            and not is_pinned_to_primary(request.user)
+        ):
+            self._replica_token = start_replica_reads()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            end_replica_reads(token)
+            self._replica_token = None
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            pin_to_primary(request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class BatchIdentityMapMixin:
+    """Share objects fetched by ``get_object`` across the sub-requests of a batch."""
+
+    def get_object(self):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        key = ('object', type(self).__name__, str(self.kwargs[lookup_url_kwarg]))
+        return remember(key, super().get_object)
+
+
+class DeltaSyncMixin:
+    """``?updated_since=<token>`` on list returns changed rows and tombstones only."""
+
+    def list(self, request, *args, **kwargs):
+        if 'updated_since' in request.query_params:
+            return delta_sync_response(self, request)
+        return super().list(request, *args, **kwargs)
+
+
+class PropertyScopedMixin:
+    """
+    Limit the queryset to the caller's properties and reject writes into
+    other properties or onto a room of another property. ``property_lookup``
+    leads the filter so it lines up with the (property, ...) composite
+    indexes.
+    """
+    property_lookup = 'property_id'
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        property_ids = user_property_ids(self.request.user)
+        if property_ids is None:
+            return queryset
+        if len(property_ids) == 1:
+            return queryset.filter(**{self.property_lookup: next(iter(property_ids))})
+        return queryset.filter(**{f'{self.property_lookup}__in': property_ids})
+
+    def check_property_scope(self, serializer):
+        data = serializer.validated_data
+        property_id = property_id_from_data(data)
+        room_property_id = room_property_id_from_data(data)
+        if room_property_id is not None:
+            target = property_id
+            if target is None and serializer.instance is not None:
+                target = property_id_of(serializer.instance)
+            if target is not None and room_property_id != target:
+                raise ValidationError({'room': 'The room belongs to a different property.'})
+
+        property_ids = user_property_ids(self.request.user)
+        if property_ids is None:
+            return
+        for scoped_id in (property_id, room_property_id):
+            if scoped_id is not None and scoped_id not in property_ids:
+                raise PermissionDenied('You do not have access to this property.')
+
+    def perform_create(self, serializer):
+        self.check_property_scope(serializer)
+        super().perform_create(serializer)
+
+    def perform_update(self, serializer):
+        self.check_property_scope(serializer)
+        super().perform_update(serializer)
+
+
+class AdmissionControlMixin:
+    """
+    Admit expensive actions through the admission class named for them in
+    ``admission_classes`` ({action: class name}). The ``search`` key applies
+    to list requests that carry a search term.
+    """
+    admission_classes = {}
+
+    def get_admission_class(self):
+        if self.action == 'list' and self.request.query_params.get('search'):
+            return self.admission_classes.get('search')
+        return self.admission_classes.get(self.action)
+
+    def initial(self, request, *args, **kwargs):
+        self._admission = None
+        super().initial(request, *args, **kwargs)
+        name = self.get_admission_class()
+        if name:
+            admission = admission_class(name)
+            admission.acquire(request.user.pk)
+            self._admission = admission
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        admission = getattr(self, '_admission', None)
+        if admission is not None:
+            admission.release()
+            self._admission = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class FastListMixin:
+    """
+    Serve ``list`` from a compiled ``values()`` projection of the list
+    serializer (see ``maintenance.fastpath``) instead of building model
+    instances and running DRF's per-field serialization. Other actions, and
+    serializers that cannot be compiled, use the regular path.
+    """
+    fast_list = True
+
+    def list(self, request, *args, **kwargs):
+        compiled = compile_serializer(self.get_serializer_class()) if self.fast_list else None
+        if compiled is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = compiled.project(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(compiled.render(page))
+        return Response(compiled.render(queryset))
+
+
+class StreamingJSONMixin:
+    """
+    Stream successful responses rendered with ``FastJSONRenderer`` whose list
+    (or paginated ``results``) holds at least JSON_STREAM_MIN_ITEMS items, so
+    the encoded body is produced chunk by chunk. The renderer is chosen
+    through REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].
+    """
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        renderer = getattr(response, 'accepted_renderer', None)
+        if (
+            response.status_code != 200
+            or not isinstance(renderer, FastJSONRenderer)
+            or not renderer.can_stream(self.get_renderer_context())
+        ):
+            return response
+
+        data = response.data
+        items = data.get('results') if isinstance(data, dict) else data
+        if not isinstance(items, list) or len(items) < getattr(settings, 'JSON_STREAM_MIN_ITEMS', 50):
+            return response
+
+        streaming = StreamingHttpResponse(renderer.iter_render(data), content_type=renderer.media_type)
+        for header, value in response.items():
+            if header.lower() != 'content-type':
+                streaming[header] = value
+        # Batch sub-requests read the payload from ``data``.
+        streaming.data = data
+        return streaming
@@ -1,10 +1,14 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.contrib.auth.models import AbstractUser
-from django.db.models.signals import post_save
+from django.contrib.postgres.indexes import GinIndex
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 
-class User(AbstractUser):
+from .tracking import DirtyFieldsMixin
+
+class User(DirtyFieldsMixin, AbstractUser):
     email = models.EmailField(_('email address'), unique=True)
     phone_number = models.CharField(max_length=20, blank=True, null=True)
     is_active = models.BooleanField(default=True)
@@ -27,7 +31,7 @@ class Topic(models.Model):
     def __str__(self):
         return self.title
 
-class Property(models.Model):
+class Property(DirtyFieldsMixin, models.Model):
     property_id = models.CharField(max_length=50, unique=True)
     name = models.CharField(max_length=200)
     address = models.TextField()
@@ -43,7 +47,7 @@ class Property(models.Model):
     def __str__(self):
         return f"{self.name} ({self.property_id})"
 
-class Room(models.Model):
+class Room(DirtyFieldsMixin, models.Model):
     room_id = models.CharField(max_length=50, unique=True)
     name = models.CharField(max_length=200)
     description = models.TextField(blank=True, null=True)
@@ -54,10 +58,32 @@ class Room(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['property', 'updated_at']),
+        ]
+
     def __str__(self):
         return f"{self.name} - {self.property.name}"
 
-class UserProfile(models.Model):
+class UserProperty(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='property_memberships')
+    property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='user_memberships')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('user', 'property')
+
+    def __str__(self):
+        return f"{self.user.email} - {self.property.name}"
+
+@receiver(post_save, sender=UserProperty)
+@receiver(post_delete, sender=UserProperty)
+def invalidate_property_memberships(sender, instance, **kwargs):
+    from .access import invalidate_user_properties
+    invalidate_user_properties(instance.user_id)
+
+class UserProfile(DirtyFieldsMixin, models.Model):
     ROLE_CHOICES = [
         ('admin', 'Administrator'),
         ('manager', 'Manager'),
@@ -88,6 +114,12 @@ class UserProfile(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            GinIndex(fields=['skills'], name='userprofile_skills_gin'),
+            GinIndex(fields=['certifications'], name='userprofile_certs_gin'),
+        ]
+
     def __str__(self):
         return f"{self.user.username}'s Profile"
 
@@ -101,10 +133,36 @@ def create_user_profile(sender, instance, created, **kwargs):
         )
 
 @receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    instance.profile.save()
-
-class Machine(models.Model):
+def save_user_profile(sender, instance, created, **kwargs):
+    # Only a profile that was loaded can have unsaved changes; DirtyFieldsMixin
+    # turns the save into a no-op when it has none.
+    if not created and User.profile.is_cached(instance):
+        instance.profile.save()
+
+@receiver(post_save, sender=UserProfile)
+def update_profile_image_variants(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    from .images import image_changed
+    image_changed(instance.original_value('profile_image') or None, instance.profile_image.name or None)
+
+@receiver(post_save, sender=Property)
+def propagate_property_rename(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if created or raw or (update_fields is not None and 'name' not in update_fields):
+        return
+    if instance.name != instance.original_value('name'):
+        from .denormalization import propagate_property_name
+        propagate_property_name(instance)
+
+@receiver(post_save, sender=Room)
+def propagate_room_rename(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if created or raw or (update_fields is not None and 'name' not in update_fields):
+        return
+    if instance.name != instance.original_value('name'):
+        from .denormalization import propagate_room_name
+        propagate_room_name(instance)
+
+class Machine(DirtyFieldsMixin, models.Model):
     machine_id = models.CharField(max_length=50, unique=True)
     name = models.CharField(max_length=100)
     status = models.CharField(max_length=20, default='active')
@@ -119,10 +177,30 @@ class Machine(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['property', 'next_maintenance_date']),
+            models.Index(fields=['next_maintenance_date']),
+            models.Index(fields=['property', 'updated_at']),
+        ]
+
     def __str__(self):
         return f"{self.name} ({self.machine_id})"
 
-class PreventiveMaintenance(models.Model):
+@receiver(post_save, sender=Property)
+@receiver(post_delete, sender=Property)
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+@receiver(post_save, sender=Machine)
+@receiver(post_delete, sender=Machine)
+def invalidate_property_tree(sender, instance, **kwargs):
+    from .hierarchy import invalidate_tree
+    property_id = instance.pk if sender is Property else instance.property_id
+    invalidate_tree(property_id)
+    if sender is not Property and instance.original_value('property_id') not in (None, property_id):
+        invalidate_tree(instance.original_value('property_id'))
+
+class PreventiveMaintenance(DirtyFieldsMixin, models.Model):
     FREQUENCY_CHOICES = [
         ('daily', 'Daily'),
         ('weekly', 'Weekly'),
@@ -153,13 +231,80 @@ class PreventiveMaintenance(models.Model):
     topics = models.ManyToManyField(Topic, related_name='maintenance_tasks')
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     procedure = models.TextField(blank=True, null=True)
+    before_image = models.ImageField(upload_to='maintenance_images/', blank=True, null=True)
+    after_image = models.ImageField(upload_to='maintenance_images/', blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['property', 'scheduled_date']),
+            models.Index(fields=['status', 'scheduled_date']),
+            models.Index(fields=['property', 'updated_at']),
+        ]
+
     def __str__(self):
         return f"{self.pmtitle} ({self.pm_id})"
 
-class Job(models.Model):
+@receiver(post_save, sender=PreventiveMaintenance)
+@receiver(post_delete, sender=PreventiveMaintenance)
+def invalidate_pm_calendar(sender, instance, **kwargs):
+    from .pm_calendar import invalidate_calendar
+    invalidate_calendar(instance.property_id)
+    previous = instance.original_value('property_id')
+    if previous is not None and previous != instance.property_id:
+        invalidate_calendar(previous)
+
+@receiver(post_save, sender=PreventiveMaintenance)
+def update_machine_maintenance(sender, instance, created, raw=False, **kwargs):
+    if created or raw:
+        return
+    from .machine_counters import pm_changed
+    pm_changed(
+        instance,
+        previous_status=instance.original_value('status'),
+        previous_scheduled_date=instance.original_value('scheduled_date'),
+        previous_completed_date=instance.original_value('completed_date'),
+    )
+
+@receiver(post_save, sender=PreventiveMaintenance)
+def update_pm_image_variants(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    from .images import image_changed
+    for field in ('before_image', 'after_image'):
+        image_changed(instance.original_value(field) or None, getattr(instance, field).name or None)
+
+@receiver(m2m_changed, sender=PreventiveMaintenance.machines.through)
+def update_linked_machine_maintenance(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        # The links are gone by post_clear, so remember whose they were.
+        instance._cleared_machine_ids = [instance.pk] if reverse else list(
+            instance.machines.values_list('pk', flat=True)
+        )
+        return
+    if action == 'post_clear':
+        machine_ids = getattr(instance, '_cleared_machine_ids', [])
+    elif action in ('post_add', 'post_remove') and pk_set:
+        machine_ids = [instance.pk] if reverse else list(pk_set)
+    else:
+        return
+    if machine_ids:
+        from .machine_counters import refresh_machines
+        refresh_machines(machine_ids)
+
+@receiver(pre_delete, sender=PreventiveMaintenance)
+def remember_pm_machines(sender, instance, **kwargs):
+    instance._deleted_machine_ids = list(instance.machines.values_list('pk', flat=True))
+
+@receiver(post_delete, sender=PreventiveMaintenance)
+def refresh_machines_after_pm_delete(sender, instance, **kwargs):
+    machine_ids = getattr(instance, '_deleted_machine_ids', [])
+    if machine_ids:
+        from .machine_counters import refresh_machines
+        refresh_machines(machine_ids)
+
+class Job(DirtyFieldsMixin, models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
         ('in_progress', 'In Progress'),
@@ -193,22 +338,92 @@ class Job(models.Model):
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='created_jobs')
     property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='jobs')
     room = models.ForeignKey(Room, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
-    property_name = models.CharField(max_length=100, blank=True, null=True)
+    property_name = models.CharField(max_length=200, blank=True, null=True)
     room_id = models.CharField(max_length=50, blank=True, null=True)
-    room_name = models.CharField(max_length=100, blank=True, null=True)
+    room_name = models.CharField(max_length=200, blank=True, null=True)
     machine_id = models.CharField(max_length=50, blank=True, null=True)
+    required_skills = models.JSONField(default=list, blank=True)
     scheduled_date = models.DateField()
     completed_date = models.DateField(null=True, blank=True)
     estimated_hours = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
     actual_hours = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
     cost = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     notes = models.TextField(blank=True, null=True)
+    text_signature = models.JSONField(default=list, blank=True, editable=False)
+    duplicate_of = models.ForeignKey(
+        'self', on_delete=models.SET_NULL, null=True, blank=True, related_name='duplicates'
+    )
+    sla_started_at = models.DateTimeField(null=True, blank=True, editable=False)
+    due_at = models.DateTimeField(null=True, blank=True, editable=False)
+    escalated_at = models.DateTimeField(null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['property', 'updated_at']),
+            models.Index(
+                fields=['property', 'room', 'created_at'],
+                condition=models.Q(status__in=['pending', 'in_progress', 'on_hold']),
+                name='job_open_dedupe_idx',
+            ),
+            models.Index(
+                fields=['due_at'],
+                condition=models.Q(status__in=['pending', 'in_progress'], due_at__isnull=False),
+                name='job_open_due_idx',
+            ),
+        ]
+
     def __str__(self):
         return f"{self.title} ({self.job_id})"
 
+    ROLLUP_FIELDS = (
+        'status', 'completed_date', 'property_id', 'room_id', 'type', 'assigned_to_id',
+        'cost', 'estimated_hours', 'actual_hours',
+    )
+
+    def save(self, *args, **kwargs):
+        self.sync_denormalized_names()
+        if not self.text_signature or (not self._state.adding and self.get_dirty_fields() & {'title', 'description'}):
+            from .dedupe import text_signature
+            self.text_signature = text_signature(self.title, self.description)
+        if self._state.adding or self.get_dirty_fields() & {'status', 'priority', 'type'}:
+            from .sla import refresh_due_at
+            if refresh_due_at(self) and kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'sla_started_at', 'due_at', 'escalated_at'}
+        super().save(*args, **kwargs)
+
+    def rollup_contribution(self, original=False):
+        """This job's (dimensions, measures) in the daily rollups, if completed.
+
+        With ``original``, the contribution as of when the job was loaded.
+        """
+        if original and not self.has_original(*self.ROLLUP_FIELDS):
+            return None
+        return self._rollup_contribution(self.original_value if original else (lambda name: getattr(self, name)))
+
+    def stored_rollup_contribution(self):
+        """The contribution of this job's row as currently stored, if any."""
+        stored = Job.objects.filter(pk=self.pk).values(*self.ROLLUP_FIELDS).first()
+        return None if stored is None else self._rollup_contribution(stored.__getitem__)
+
+    @staticmethod
+    def _rollup_contribution(value):
+        if value('status') != 'completed' or value('completed_date') is None:
+            return None
+        return (
+            (value('completed_date'), value('property_id'), value('room_id'), value('type'), value('assigned_to_id')),
+            (value('cost'), value('estimated_hours'), value('actual_hours')),
+        )
+
+    def sync_denormalized_names(self):
+        # Only refresh from relations that are already loaded, so saves never
+        # pay for an extra query just to copy a name.
+        if Job.property.is_cached(self) or (self.property_name is None and self.property_id):
+            self.property_name = self.property.name
+        if Job.room.is_cached(self):
+            self.room_name = self.room.name if self.room is not None else None
+
 class JobAttachment(models.Model):
     job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='attachments')
     file_name = models.CharField(max_length=255)
@@ -221,7 +436,7 @@ class JobAttachment(models.Model):
     def __str__(self):
         return f"{self.file_name} - {self.job.title}"
 
-class JobChecklistItem(models.Model):
+class JobChecklistItem(DirtyFieldsMixin, models.Model):
     job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='checklist')
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True, null=True)
@@ -229,18 +444,241 @@ class JobChecklistItem(models.Model):
     completed_at = models.DateTimeField(null=True, blank=True)
     completed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='completed_checklist_items')
     order = models.IntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_at']),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.job.title}"
 
+class ChecklistTemplate(models.Model):
+    name = models.CharField(max_length=200)
+    description = models.TextField(blank=True, null=True)
+    machines = models.ManyToManyField(Machine, blank=True, related_name='checklist_templates')
+    topics = models.ManyToManyField(Topic, blank=True, related_name='checklist_templates')
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.name
+
+class ChecklistTemplateItem(models.Model):
+    template = models.ForeignKey(ChecklistTemplate, on_delete=models.CASCADE, related_name='items')
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True, null=True)
+    order = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['template', 'order', 'id']
+
+    def __str__(self):
+        return f"{self.title} - {self.template.name}"
+
+class SLAPolicy(models.Model):
+    priority = models.CharField(max_length=20, choices=Job.PRIORITY_CHOICES)
+    type = models.CharField(max_length=20, choices=Job.TYPE_CHOICES, blank=True, default='',
+                            help_text='Leave empty to apply to every job type without its own policy.')
+    resolution_hours = models.DecimalField(max_digits=7, decimal_places=2)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['priority', 'type'], name='unique_sla_policy'),
+        ]
+
+    def __str__(self):
+        return f"{self.priority} {self.type or 'any type'}: {self.resolution_hours}h"
+
+@receiver(post_save, sender=SLAPolicy)
+@receiver(post_delete, sender=SLAPolicy)
+def invalidate_sla_policies(sender, instance, **kwargs):
+    from .sla import invalidate_policies
+    invalidate_policies()
+
+class JobDurationForecast(models.Model):
+    LEVEL_CHOICES = [
+        ('machine', 'Machine'),
+        ('property', 'Property'),
+        ('type', 'Job type'),
+    ]
+
+    level = models.CharField(max_length=10, choices=LEVEL_CHOICES)
+    key = models.CharField(max_length=50, blank=True)
+    type = models.CharField(max_length=20, choices=Job.TYPE_CHOICES)
+    sample_size = models.IntegerField(default=0)
+    hours_p10 = models.FloatField(null=True, blank=True)
+    hours_median = models.FloatField(null=True, blank=True)
+    hours_p90 = models.FloatField(null=True, blank=True)
+    hours_trend = models.FloatField(null=True, blank=True)
+    cost_samples = models.IntegerField(default=0)
+    cost_median = models.FloatField(null=True, blank=True)
+    cost_p90 = models.FloatField(null=True, blank=True)
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['level', 'key', 'type'], name='unique_job_forecast'),
+        ]
+
+    def __str__(self):
+        return f"{self.level} {self.key} {self.type}: {self.hours_median}h"
+
 class JobHistory(models.Model):
     job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='history')
     action = models.CharField(max_length=100)
     description = models.TextField()
-    performed_by = models.ForeignKey(User, on_delete=models.CASCADE)
+    performed_by = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
     performed_at = models.DateTimeField(auto_now_add=True)
     previous_status = models.CharField(max_length=20, choices=Job.STATUS_CHOICES, null=True, blank=True)
     new_status = models.CharField(max_length=20, choices=Job.STATUS_CHOICES, null=True, blank=True)
+    changes = models.JSONField(default=dict, blank=True)
+
+    def __str__(self):
+        return f"{self.action} - {self.job.title}"
+
+class JobDailyRollup(models.Model):
+    date = models.DateField()
+    property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='job_rollups')
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, null=True, blank=True, related_name='job_rollups')
+    type = models.CharField(max_length=20, choices=Job.TYPE_CHOICES)
+    assigned_to = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='job_rollups')
+    job_count = models.IntegerField(default=0)
+    total_cost = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    estimated_hours = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    actual_hours = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    # Sum of (actual - estimated) over jobs that recorded both.
+    hours_variance = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    variance_job_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'property', 'room', 'type', 'assigned_to'],
+                name='unique_job_daily_rollup',
+                nulls_distinct=False,
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['property', 'date']),
+            models.Index(fields=['date']),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.type} - {self.property_id}"
+
+@receiver(pre_save, sender=Job)
+@receiver(pre_delete, sender=Job)
+def remember_stored_rollup(sender, instance, raw=False, **kwargs):
+    # Without a loaded snapshot (.only(), or a job saved without loading it)
+    # the old contribution is unknown, not absent: read it back from the row.
+    if not raw and instance.pk is not None and not instance.has_original(*Job.ROLLUP_FIELDS):
+        instance._stored_rollup = instance.stored_rollup_contribution()
+
+def _old_rollup(instance):
+    if '_stored_rollup' in instance.__dict__:
+        return instance.__dict__.pop('_stored_rollup')
+    return instance.rollup_contribution(original=True)
+
+@receiver(post_save, sender=Job)
+def update_job_rollups(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    from .rollups import apply_rollup_change
+    old = _old_rollup(instance)
+    apply_rollup_change(None if created else old, instance.rollup_contribution())
+
+@receiver(post_delete, sender=Job)
+def remove_job_from_rollups(sender, instance, **kwargs):
+    from .rollups import apply_rollup_change
+    apply_rollup_change(_old_rollup(instance), None)
+
+class ChangeEvent(models.Model):
+    ACTION_CHOICES = [
+        ('created', 'Created'),
+        ('updated', 'Updated'),
+        ('deleted', 'Deleted'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    entity = models.CharField(max_length=50)
+    entity_id = models.IntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    property_id = models.IntegerField(null=True, blank=True)
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['property_id', 'id']),
+            models.Index(fields=['created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.entity} {self.entity_id} {self.action}"
+
+@receiver(post_save, sender=Job)
+@receiver(post_save, sender=PreventiveMaintenance)
+@receiver(post_save, sender=JobChecklistItem)
+def record_saved_change(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    from .changefeed import record_change
+    record_change(instance, 'created' if created else 'updated')
+
+@receiver(post_save, sender=Job)
+def audit_job(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    from .audit import record_job_save
+    record_job_save(instance, created)
+
+@receiver(post_save, sender=JobChecklistItem)
+def audit_checklist_item(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    from .audit import record_checklist_item_save
+    record_checklist_item_save(instance, created)
+
+@receiver(post_delete, sender=JobChecklistItem)
+def audit_checklist_item_removal(sender, instance, origin=None, **kwargs):
+    # Items deleted along with their job have no job left to record against.
+    if getattr(origin, 'model', type(origin)) is JobChecklistItem:
+        from .audit import record_checklist_item_delete
+        record_checklist_item_delete(instance)
+
+@receiver(post_delete, sender=Job)
+@receiver(post_delete, sender=PreventiveMaintenance)
+@receiver(post_delete, sender=JobChecklistItem)
+def record_deleted_change(sender, instance, **kwargs):
+    from .changefeed import record_change
+    record_change(instance, 'deleted')
+
+class DeletionLog(models.Model):
+    id = models.BigAutoField(primary_key=True)
+    entity = models.CharField(max_length=50)
+    entity_id = models.IntegerField()
+    property_id = models.IntegerField(null=True, blank=True)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['entity', 'deleted_at']),
+        ]
 
     def __str__(self):
-        return f"{self.action} - {self.job.title}" 
\ No newline at end of file
+        return f"{self.entity} {self.entity_id} deleted"
+
+@receiver(post_delete, sender=Job)
+@receiver(post_delete, sender=PreventiveMaintenance)
+@receiver(post_delete, sender=JobChecklistItem)
+@receiver(post_delete, sender=Room)
+@receiver(post_delete, sender=Machine)
+def record_tombstone(sender, instance, **kwargs):
+    from .sync import record_deletion
+    record_deletion(instance)
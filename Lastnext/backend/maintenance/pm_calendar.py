@@ -0,0 +1,168 @@
+"""
+Preventive maintenance calendar.
+
+Returns the stored PM occurrences in a date window plus virtual future
+occurrences projected from each open PM's ``frequency``/``custom_days``.
+Results are cached per property and calendar month under a version that is
+bumped whenever a PM of that property changes. All the months and
+properties missing from the cache are loaded with one query; open PMs
+scheduled before the window are only read for months that are not over yet
+and only when their frequency can land in one of them.
+"""
+import calendar
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from .caching import bump_cache_version, cache_version
+from .models import PreventiveMaintenance
+
+OPEN_STATUSES = ('pending', 'overdue')
+FREQUENCY_DAYS = {'daily': 1, 'weekly': 7, 'biweekly': 14}
+FREQUENCY_MONTHS = {'monthly': 1, 'quarterly': 3, 'biannually': 6, 'annually': 12}
+PM_FIELDS = (
+    'id', 'pm_id', 'pmtitle', 'scheduled_date', 'status', 'frequency',
+    'custom_days', 'property_id', 'room_id',
+)
+
+
+def add_months(day, months):
+    month_index = day.month - 1 + months
+    year, month = day.year + month_index // 12, month_index % 12 + 1
+    return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def recurrence_dates(first, frequency, custom_days, until):
+    """Dates after ``first`` on which a PM recurs, up to ``until`` inclusive."""
+    if frequency in FREQUENCY_MONTHS:
+        step = FREQUENCY_MONTHS[frequency]
+        n = 1
+        while (current := add_months(first, step * n)) <= until:
+            yield current
+            n += 1
+        return
+    days = custom_days if frequency == 'custom' else FREQUENCY_DAYS.get(frequency)
+    if not days or days <= 0:
+        return
+    current = first + timedelta(days=days)
+    while current <= until:
+        yield current
+        current += timedelta(days=days)
+
+
+def _occurrence(pm, day, virtual):
+    return {
+        'id': pm['id'],
+        'pm_id': pm['pm_id'],
+        'pmtitle': pm['pmtitle'],
+        'date': day,
+        'status': pm['status'] if not virtual else 'pending',
+        'frequency': pm['frequency'],
+        'property_id': pm['property_id'],
+        'room_id': pm['room_id'],
+        'virtual': virtual,
+    }
+
+
+def _month_end(month_start):
+    return add_months(month_start, 1) - timedelta(days=1)
+
+
+def _recurs_in(months):
+    """PMs whose recurrence can land in one of ``months`` (first days), judged by frequency alone."""
+    recurring = Q(frequency__in=FREQUENCY_DAYS) | Q(frequency='custom', custom_days__gt=0)
+    for frequency, step in FREQUENCY_MONTHS.items():
+        # Every step divides 12, so a month-based PM only recurs in months
+        # whose month of year matches its own modulo the step.
+        residues = {(month.month - 1) % step for month in months}
+        if len(residues) == step:
+            recurring |= Q(frequency=frequency)
+        else:
+            month_numbers = [number for number in range(1, 13) if (number - 1) % step in residues]
+            recurring |= Q(frequency=frequency, scheduled_date__month__in=month_numbers)
+    return recurring
+
+
+def _load_months(scopes, months, today):
+    """Occurrences per (scope, month start) for every scope and month, with one query."""
+    first, last = months[0], _month_end(months[-1])
+    conditions = Q(scheduled_date__range=(first, last))
+    # Virtual occurrences are only projected after today, so only months
+    # that are not over yet need the open PMs scheduled before the window.
+    upcoming = [month for month in months if _month_end(month) > today]
+    if upcoming:
+        conditions |= Q(status__in=OPEN_STATUSES, scheduled_date__lt=first) & _recurs_in(upcoming)
+    pms = PreventiveMaintenance.objects.filter(conditions)
+    if scopes != [None]:
+        pms = pms.filter(property_id__in=scopes)
+
+    wanted = set(months)
+    loaded = {(scope, month): [] for scope in scopes for month in months}
+    for pm in pms.values(*PM_FIELDS):
+        scope = None if scopes == [None] else pm['property_id']
+        scheduled_month = pm['scheduled_date'].replace(day=1)
+        if scheduled_month in wanted:
+            loaded[(scope, scheduled_month)].append(_occurrence(pm, pm['scheduled_date'], virtual=False))
+        if pm['status'] not in OPEN_STATUSES:
+            continue
+        for day in recurrence_dates(pm['scheduled_date'], pm['frequency'], pm['custom_days'], last):
+            month = day.replace(day=1)
+            if month in wanted and day > today:
+                loaded[(scope, month)].append(_occurrence(pm, day, virtual=True))
+    return loaded
+
+
+def _cache_key(scope, month_start, today, version):
+    return f'pm-calendar:{calendar_namespace(scope)}:{month_start:%Y-%m}:{today}:v{version}'
+
+
+def calendar_namespace(property_id):
+    return f'pm-calendar:{property_id if property_id is not None else "all"}'
+
+
+def invalidate_calendar(property_id):
+    bump_cache_version(calendar_namespace(property_id))
+    bump_cache_version(calendar_namespace(None))
+
+
+def pm_calendar(start, end, property_ids=None):
+    """
+    Occurrences between ``start`` and ``end`` for the given properties, or
+    for every property when ``property_ids`` is None.
+    """
+    today = timezone.localdate()
+    scopes = [None] if property_ids is None else sorted(property_ids)
+    months = []
+    month = start.replace(day=1)
+    while month <= end:
+        months.append(month)
+        month = add_months(month, 1)
+    if not scopes or not months:
+        return []
+
+    versions = {scope: cache_version(calendar_namespace(scope)) for scope in scopes}
+    keys = {
+        (scope, month): _cache_key(scope, month, today, versions[scope])
+        for scope in scopes for month in months
+    }
+    cached = cache.get_many(keys.values())
+    missing = [pair for pair, key in keys.items() if key not in cached]
+    if missing:
+        loaded = _load_months(
+            sorted({scope for scope, _ in missing}),
+            sorted({month for _, month in missing}),
+            today,
+        )
+        fresh = {keys[pair]: loaded[pair] for pair in missing}
+        cache.set_many(fresh, getattr(settings, 'PM_CALENDAR_CACHE_SECONDS', 3600))
+        cached.update(fresh)
+
+    occurrences = [
+        item for key in keys.values() for item in cached[key]
+        if start <= item['date'] <= end
+    ]
+    occurrences.sort(key=lambda item: (item['date'], item['id']))
+    return occurrences
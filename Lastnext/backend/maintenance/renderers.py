@@ -0,0 +1,99 @@
+"""
+JSON rendering for the maintenance API.
+
+``FastJSONRenderer`` encodes with orjson when it is installed and falls back
+to DRF's encoder otherwise. Values orjson would format differently from DRF
+(datetimes, dates, times, Decimals, lazy strings, ...) are passed through to
+DRF's own ``JSONEncoder.default``, so the output decodes to the same document
+as the stock renderer's; the bytes can still differ in corner cases such as
+float formatting. Register it in place of the stock renderer::
+
+    REST_FRAMEWORK = {
+        'DEFAULT_RENDERER_CLASSES': [
+            'maintenance.renderers.FastJSONRenderer',
+            'rest_framework.renderers.BrowsableAPIRenderer',
+        ],
+    }
+
+``iter_render`` produces the same document in chunks, encoding a large list
+(a bare list or a paginated ``results``) item by item so the full response
+never has to exist in memory at once; ``StreamingJSONMixin`` uses it for
+large responses.
+"""
+import json
+
+from rest_framework import renderers
+from rest_framework.compat import SHORT_SEPARATORS
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+CHUNK_SIZE = 64 * 1024
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    def _compact(self, renderer_context):
+        return self.compact and self.get_indent(self.media_type, renderer_context or {}) is None
+
+    def dumps(self, data):
+        """Compact encoding of the same document the stock renderer produces."""
+        if orjson is not None and not self.ensure_ascii:
+            output = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+            )
+        else:
+            output = json.dumps(
+                data, cls=self.encoder_class, ensure_ascii=self.ensure_ascii,
+                allow_nan=not self.strict, separators=SHORT_SEPARATORS,
+            ).encode()
+        # Same escaping as the stock renderer: U+2028/U+2029 break JavaScript.
+        return output.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or not self._compact(renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+        return self.dumps(data)
+
+    def can_stream(self, renderer_context=None):
+        return self._compact(renderer_context)
+
+    def _iter_array(self, items):
+        yield b'['
+        for index, item in enumerate(items):
+            if index:
+                yield b','
+            yield self.dumps(item)
+        yield b']'
+
+    def _iter_pieces(self, data):
+        if isinstance(data, list):
+            yield from self._iter_array(data)
+            return
+        yield b'{'
+        for index, (key, value) in enumerate(data.items()):
+            if index:
+                yield b','
+            yield self.dumps(str(key)) + b':'
+            if key == 'results' and isinstance(value, list):
+                yield from self._iter_array(value)
+            else:
+                yield self.dumps(value)
+        yield b'}'
+
+    def iter_render(self, data, chunk_size=CHUNK_SIZE):
+        """Yield the rendered document in chunks of roughly ``chunk_size`` bytes."""
+        buffer, size = [], 0
+        for piece in self._iter_pieces(data):
+            buffer.append(piece)
+            size += len(piece)
+            if size >= chunk_size:
+                yield b''.join(buffer)
+                buffer, size = [], 0
+        if buffer:
+            yield b''.join(buffer)
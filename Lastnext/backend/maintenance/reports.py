@@ -0,0 +1,176 @@
+"""
+Server-side PDF reports for preventive maintenance and jobs.
+
+Rendering runs in a process pool (REPORT_WORKERS processes) so it does not
+contend for the GIL. A request for a report that is not cached still waits
+for its render; ``manage.py render_reports`` pre-renders them in bulk. Output is stored
+under a content hash of the report's parameters, the property name and its
+rows' ``updated_at`` values and joined names (a rename does not touch the
+rows' timestamps). The fingerprint query reads only those columns, so an
+unchanged report is served from storage without loading or rendering rows.
+
+Requires reportlab. Set REPORT_FONT_DIR to the directory holding
+Sarabun-Regular.ttf and Sarabun-Bold.ttf to render Thai text.
+"""
+import hashlib
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from .models import Job, PreventiveMaintenance, Property
+
+try:
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+except ImportError:
+    pdfmetrics = None
+
+REPORT_VERSION = 1
+
+REPORT_KINDS = {
+    'maintenance': {
+        'model': PreventiveMaintenance,
+        'date_field': 'scheduled_date',
+        'fields': ('pm_id', 'pmtitle', 'room__name', 'frequency', 'scheduled_date', 'completed_date', 'status'),
+        'joined': ('room__name',),
+        'headers': ('PM ID', 'Title', 'Room', 'Frequency', 'Scheduled', 'Completed', 'Status'),
+        'title': 'Preventive Maintenance Report',
+    },
+    'jobs': {
+        'model': Job,
+        'date_field': 'scheduled_date',
+        'fields': ('job_id', 'title', 'room_name', 'type', 'priority', 'scheduled_date', 'status'),
+        'joined': ('room_name',),
+        'headers': ('Job ID', 'Title', 'Room', 'Type', 'Priority', 'Scheduled', 'Status'),
+        'title': 'Job Report',
+    },
+}
+
+
+def _rows(kind, property_id, start, end):
+    spec = REPORT_KINDS[kind]
+    return spec['model'].objects.filter(
+        property_id=property_id,
+        **{f"{spec['date_field']}__range": (start, end)},
+    ).order_by(spec['date_field'], 'pk')
+
+
+def _property_name(property_id):
+    return Property.objects.filter(pk=property_id).values_list('name', flat=True).first()
+
+
+def report_hash(kind, property_id, start, end):
+    """Content hash of the report; changes whenever a row or a name it shows is updated, added or removed."""
+    spec = REPORT_KINDS[kind]
+    name = _property_name(property_id)
+    digest = hashlib.sha256(f'{REPORT_VERSION}:{kind}:{property_id}:{name!r}:{start}:{end}'.encode())
+    rows = _rows(kind, property_id, start, end).values_list('pk', 'updated_at', *spec['joined'])
+    for pk, updated_at, *joined in rows.iterator():
+        digest.update(f'|{pk}:{updated_at.isoformat()}:{joined!r}'.encode())
+    return digest.hexdigest()
+
+
+def report_path(digest):
+    return f'reports/{digest[:2]}/{digest}.pdf'
+
+
+def _register_fonts(font_dir):
+    if not font_dir or 'Sarabun' in pdfmetrics.getRegisteredFontNames():
+        return 'Sarabun' if font_dir else 'Helvetica'
+    pdfmetrics.registerFont(TTFont('Sarabun', os.path.join(font_dir, 'Sarabun-Regular.ttf')))
+    pdfmetrics.registerFont(TTFont('Sarabun-Bold', os.path.join(font_dir, 'Sarabun-Bold.ttf')))
+    return 'Sarabun'
+
+
+def render_pdf(title, subtitle, headers, rows, font_dir=None):
+    """Render a tabular report to PDF bytes. Runs in a worker process."""
+    font = _register_fonts(font_dir)
+    bold = 'Sarabun-Bold' if font == 'Sarabun' else 'Helvetica-Bold'
+    styles = getSampleStyleSheet()
+    for style in styles.byName.values():
+        style.fontName = font
+
+    buffer = io.BytesIO()
+    document = SimpleDocTemplate(buffer, pagesize=landscape(A4), title=title)
+    table = Table([list(headers)] + [['' if value is None else str(value) for value in row] for row in rows], repeatRows=1)
+    table.setStyle(TableStyle([
+        ('FONTNAME', (0, 0), (-1, -1), font),
+        ('FONTNAME', (0, 0), (-1, 0), bold),
+        ('FONTSIZE', (0, 0), (-1, -1), 8),
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#e5e7eb')),
+        ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ]))
+    document.build([
+        Paragraph(title, styles['Title']),
+        Paragraph(subtitle, styles['Normal']),
+        Spacer(1, 12),
+        table,
+    ])
+    return buffer.getvalue()
+
+
+_executor = None
+
+
+def _pool():
+    global _executor
+    if pdfmetrics is None:
+        raise ImproperlyConfigured('PDF reports require the reportlab package')
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=getattr(settings, 'REPORT_WORKERS', 2))
+    return _executor
+
+
+def _render_job(kind, property_id, start, end):
+    spec = REPORT_KINDS[kind]
+    name = _property_name(property_id) or property_id
+    rows = list(_rows(kind, property_id, start, end).values_list(*spec['fields']))
+    return (
+        spec['title'],
+        f'{name}: {start} to {end} ({len(rows)} items)',
+        spec['headers'],
+        rows,
+        getattr(settings, 'REPORT_FONT_DIR', None),
+    )
+
+
+def get_or_render_report(kind, property_id, start, end, digest=None):
+    """Storage path of the report's PDF, rendering it first if it is not cached."""
+    path = report_path(digest or report_hash(kind, property_id, start, end))
+    if not default_storage.exists(path):
+        pdf = _pool().submit(render_pdf, *_render_job(kind, property_id, start, end)).result()
+        if not default_storage.exists(path):
+            default_storage.save(path, ContentFile(pdf))
+    return path
+
+
+def render_reports(kind, property_ids, start, end, progress=None):
+    """Render reports for many properties concurrently; returns {property id: path}."""
+    paths, pending = {}, {}
+    pool = _pool()
+    for property_id in property_ids:
+        path = report_path(report_hash(kind, property_id, start, end))
+        paths[property_id] = path
+        if not default_storage.exists(path):
+            future = pool.submit(render_pdf, *_render_job(kind, property_id, start, end))
+            pending[future] = (property_id, path)
+        elif progress:
+            progress(property_id, path, cached=True)
+
+    for future in as_completed(pending):
+        property_id, path = pending[future]
+        if not default_storage.exists(path):
+            default_storage.save(path, ContentFile(future.result()))
+        if progress:
+            progress(property_id, path, cached=False)
+    return paths
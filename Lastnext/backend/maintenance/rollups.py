@@ -0,0 +1,179 @@
+"""
+Daily cost and labor rollups of completed jobs.
+
+``JobDailyRollup`` holds one row per (completed date, property, room, type,
+assignee). Job saves apply the difference between a job's old and new
+contribution with F() increments, and ``rebuild_job_rollups`` recomputes a
+date range from the raw table with grouped queries.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import (
+    Count, DecimalField, ExpressionWrapper, F, Max, Min, Q, Sum, Value
+)
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from .models import Job, JobDailyRollup
+
+ZERO = Decimal('0')
+DIMENSIONS = ('date', 'property_id', 'room_id', 'type', 'assigned_to_id')
+
+
+def _measures(contribution, sign):
+    cost, estimated, actual = contribution
+    has_variance = estimated is not None and actual is not None
+    return {
+        'job_count': sign,
+        'total_cost': sign * (cost or ZERO),
+        'estimated_hours': sign * (estimated or ZERO),
+        'actual_hours': sign * (actual or ZERO),
+        'hours_variance': sign * (actual - estimated) if has_variance else ZERO,
+        'variance_job_count': sign if has_variance else 0,
+    }
+
+
+def _apply(dimensions, deltas):
+    lookup = dict(zip(DIMENSIONS, dimensions))
+    increments = {name: F(name) + value for name, value in deltas.items()}
+    if JobDailyRollup.objects.filter(**lookup).update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            JobDailyRollup.objects.create(**lookup, **deltas)
+    except IntegrityError:
+        # A concurrent writer created the row first.
+        JobDailyRollup.objects.filter(**lookup).update(**increments)
+
+
+def apply_rollup_change(old, new):
+    """Move a job's contribution from ``old`` to ``new`` (either may be None)."""
+    if old == new:
+        return
+    with transaction.atomic():
+        if old is not None:
+            _apply(old[0], _measures(old[1], -1))
+        if new is not None:
+            _apply(new[0], _measures(new[1], 1))
+
+
+def _month_start(day):
+    return day.replace(day=1)
+
+
+def _next_month(day):
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def rebuild_job_rollups(start=None, end=None, batch_size=1000, progress=None):
+    """
+    Recompute the rollups for completed jobs between ``start`` and ``end``
+    (inclusive), one calendar month per transaction. Returns rows written.
+    """
+    completed = Job.objects.filter(status='completed', completed_date__isnull=False)
+    if start is None or end is None:
+        bounds = completed.aggregate(first=Min('completed_date'), last=Max('completed_date'))
+        if bounds['first'] is None:
+            return 0
+        start = start or bounds['first']
+        end = end or bounds['last']
+
+    both_hours = Q(actual_hours__isnull=False, estimated_hours__isnull=False)
+    variance = ExpressionWrapper(
+        F('actual_hours') - F('estimated_hours'),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+    written = 0
+    month = _month_start(start)
+    while month <= end:
+        chunk_start, chunk_end = max(month, start), min(_next_month(month) - timedelta(days=1), end)
+        rows = (
+            completed.filter(completed_date__range=(chunk_start, chunk_end))
+            .values('completed_date', 'property_id', 'room', 'type', 'assigned_to_id')
+            .annotate(
+                job_count=Count('id'),
+                total_cost=Coalesce(Sum('cost'), Value(ZERO)),
+                estimated=Coalesce(Sum('estimated_hours'), Value(ZERO)),
+                actual=Coalesce(Sum('actual_hours'), Value(ZERO)),
+                variance=Coalesce(Sum(variance, filter=both_hours), Value(ZERO)),
+                variance_count=Count('id', filter=both_hours),
+            )
+            .order_by()
+        )
+        with transaction.atomic():
+            JobDailyRollup.objects.filter(date__range=(chunk_start, chunk_end)).delete()
+            batch = []
+            for row in rows.iterator():
+                batch.append(JobDailyRollup(
+                    date=row['completed_date'],
+                    property_id=row['property_id'],
+                    room_id=row['room'],
+                    type=row['type'],
+                    assigned_to_id=row['assigned_to_id'],
+                    job_count=row['job_count'],
+                    total_cost=row['total_cost'],
+                    estimated_hours=row['estimated'],
+                    actual_hours=row['actual'],
+                    hours_variance=row['variance'],
+                    variance_job_count=row['variance_count'],
+                ))
+                if len(batch) >= batch_size:
+                    JobDailyRollup.objects.bulk_create(batch)
+                    written += len(batch)
+                    batch = []
+            JobDailyRollup.objects.bulk_create(batch)
+            written += len(batch)
+        if progress:
+            progress(chunk_start, chunk_end, written)
+        month = _next_month(month)
+    return written
+
+
+GROUPINGS = {
+    'type': 'type',
+    'property': 'property_id',
+    'room': 'room_id',
+    'assignee': 'assigned_to_id',
+}
+
+
+def job_trends(months=12, property_ids=None, group_by=None, today=None):
+    """Monthly totals for the last ``months`` months, answered from the rollups."""
+    today = today or timezone.localdate()
+    start = _month_start(today)
+    for _ in range(months - 1):
+        start = _month_start(start - timedelta(days=1))
+
+    rollups = JobDailyRollup.objects.filter(date__gte=start)
+    if property_ids is not None:
+        rollups = rollups.filter(property_id__in=property_ids)
+    keys = ['month'] + ([GROUPINGS[group_by]] if group_by else [])
+    rows = (
+        rollups.annotate(month=TruncMonth('date'))
+        .values(*keys)
+        .annotate(
+            jobs=Sum('job_count'),
+            cost=Sum('total_cost'),
+            estimated=Sum('estimated_hours'),
+            actual=Sum('actual_hours'),
+            variance=Sum('hours_variance'),
+            variance_jobs=Sum('variance_job_count'),
+        )
+        .order_by(*keys)
+    )
+    return [
+        {
+            **{key: row[key] for key in keys},
+            'job_count': row['jobs'],
+            'total_cost': row['cost'],
+            'estimated_hours': row['estimated'],
+            'actual_hours': row['actual'],
+            'hours_variance': row['variance'],
+            'average_variance': (
+                row['variance'] / row['variance_jobs'] if row['variance_jobs'] else None
+            ),
+        }
+        for row in rows
+    ]
@@ -1,13 +1,21 @@
 from rest_framework import serializers
+from django.conf import settings
+from django.db import transaction
 from django.contrib.auth import get_user_model
 from .models import (
     Topic, Machine, PreventiveMaintenance, Job,
     JobAttachment, JobChecklistItem, JobHistory,
-    Property, Room, UserProfile,
+    Property, Room, UserProfile, ChecklistTemplate, ChecklistTemplateItem,
     PreventiveMaintenanceMachine, PreventiveMaintenanceTopic
 )
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
+from .images import image_payload, image_url
+from .dedupe import find_duplicate, text_signature
+from .checklists import instantiate_checklists, job_templates_for
+from .forecasting import forecast_hours
+from .audit import record_entry
+from .machine_counters import refresh_machines
 import base64
 import uuid
 
@@ -29,18 +37,23 @@ class UserProfileSerializer(serializers.ModelSerializer):
     certifications = serializers.JSONField(required=False)
     emergency_contact = serializers.JSONField(required=False)
     notification_preferences = serializers.JSONField(required=False)
+    profile_image_variants = serializers.SerializerMethodField()
     
     class Meta:
         model = UserProfile
         fields = [
             'id', 'user', 'role', 'department', 'phone_number',
-            'profile_image', 'bio', 'skills', 'certifications',
+            'profile_image', 'profile_image_variants', 'bio', 'skills', 'certifications',
             'emergency_contact', 'preferred_language', 'timezone',
             'notification_preferences', 'is_active', 'created_at',
             'updated_at'
         ]
         read_only_fields = ['created_at', 'updated_at']
 
+    def get_profile_image_variants(self, obj):
+        payload = image_payload(obj.profile_image, self.context.get('request'))
+        return payload['variants'] if payload else None
+
 class UserCreateSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
     profile = UserProfileSerializer(required=False)
@@ -166,12 +179,49 @@ class JobChecklistItemSerializer(serializers.ModelSerializer):
             'completed_at', 'completed_by', 'order'
         ]
 
+class ChecklistTemplateItemSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ChecklistTemplateItem
+        fields = ['id', 'title', 'description', 'order']
+
+class ChecklistTemplateSerializer(serializers.ModelSerializer):
+    items = ChecklistTemplateItemSerializer(many=True, required=False)
+
+    class Meta:
+        model = ChecklistTemplate
+        fields = [
+            'id', 'name', 'description', 'machines', 'topics', 'is_active',
+            'items', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['created_at', 'updated_at']
+
+    def _replace_items(self, template, items):
+        template.items.all().delete()
+        ChecklistTemplateItem.objects.bulk_create([
+            ChecklistTemplateItem(template=template, **item) for item in items
+        ])
+
+    @transaction.atomic
+    def create(self, validated_data):
+        items = validated_data.pop('items', [])
+        template = super().create(validated_data)
+        self._replace_items(template, items)
+        return template
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        items = validated_data.pop('items', None)
+        template = super().update(instance, validated_data)
+        if items is not None:
+            self._replace_items(template, items)
+        return template
+
 class JobHistorySerializer(serializers.ModelSerializer):
     class Meta:
         model = JobHistory
         fields = [
             'id', 'job', 'action', 'description', 'performed_by',
-            'performed_at', 'previous_status', 'new_status'
+            'performed_at', 'previous_status', 'new_status', 'changes'
         ]
 
 class JobSerializer(serializers.ModelSerializer):
@@ -189,17 +239,66 @@ class JobSerializer(serializers.ModelSerializer):
             'id', 'job_id', 'title', 'description', 'status', 'priority',
             'type', 'assigned_to', 'created_by', 'property', 'room',
             'scheduled_date', 'completed_date', 'estimated_hours',
-            'actual_hours', 'cost', 'notes', 'attachments', 'checklist',
-            'history', 'created_at', 'updated_at'
+            'actual_hours', 'cost', 'notes', 'required_skills', 'duplicate_of',
+            'sla_started_at', 'due_at', 'escalated_at', 'attachments', 'checklist', 'history', 'created_at', 'updated_at'
         ]
 
 class JobCreateSerializer(serializers.ModelSerializer):
+    on_duplicate = serializers.ChoiceField(
+        choices=['flag', 'merge', 'allow'], default='flag', write_only=True
+    )
+    checklist_templates = serializers.PrimaryKeyRelatedField(
+        queryset=ChecklistTemplate.objects.filter(is_active=True),
+        many=True, required=False, write_only=True
+    )
+
     class Meta:
         model = Job
         fields = [
-            'title', 'description', 'priority', 'type', 'property',
-            'room', 'scheduled_date', 'estimated_hours', 'notes'
+            'id', 'title', 'description', 'priority', 'type', 'property',
+            'room', 'machine_id', 'scheduled_date', 'estimated_hours', 'notes',
+            'required_skills', 'duplicate_of', 'on_duplicate', 'checklist_templates'
         ]
+        read_only_fields = ['id', 'duplicate_of']
+
+    def create(self, validated_data):
+        on_duplicate = validated_data.pop('on_duplicate', 'flag')
+        templates = validated_data.pop('checklist_templates', [])
+        signature = text_signature(validated_data.get('title'), validated_data.get('description'))
+        validated_data['text_signature'] = signature
+        self.merged = False
+        if on_duplicate == 'allow':
+            return self._create_job(validated_data, templates)
+
+        room = validated_data.get('room')
+        duplicate, score = find_duplicate(
+            validated_data['property'].pk, signature,
+            room_id=room.pk if room else None,
+            machine_id=validated_data.get('machine_id'),
+        )
+        if duplicate is not None and on_duplicate == 'merge':
+            record_entry(
+                duplicate.pk,
+                'duplicate_merged',
+                f"Duplicate report merged ({score:.0%} similar): {validated_data.get('title')}",
+                performed_by=validated_data['created_by'],
+                previous_status=duplicate.status,
+                new_status=duplicate.status,
+            )
+            self.merged = True
+            return duplicate
+        validated_data['duplicate_of'] = duplicate
+        return self._create_job(validated_data, templates)
+
+    def _create_job(self, validated_data, templates):
+        if validated_data.get('estimated_hours') is None:
+            validated_data['estimated_hours'] = forecast_hours(
+                validated_data.get('machine_id'), validated_data['property'].pk, validated_data.get('type')
+            )
+        with transaction.atomic():
+            job = super().create(validated_data)
+            instantiate_checklists([(job, job_templates_for(job, [template.pk for template in templates]), ())])
+        return job
 
 class JobUpdateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -208,7 +307,7 @@ class JobUpdateSerializer(serializers.ModelSerializer):
             'title', 'description', 'status', 'priority', 'type',
             'assigned_to', 'property', 'room', 'scheduled_date',
             'completed_date', 'estimated_hours', 'actual_hours',
-            'cost', 'notes'
+            'cost', 'notes', 'required_skills'
         ]
 
 class PreventiveMaintenanceMachineSerializer(serializers.ModelSerializer):
@@ -281,6 +380,8 @@ class PreventiveMaintenanceSerializer(serializers.ModelSerializer):
         required=False,
         allow_null=True
     )
+    before_image_url = serializers.SerializerMethodField()
+    after_image_url = serializers.SerializerMethodField()
     before_image = serializers.SerializerMethodField()
     after_image = serializers.SerializerMethodField()
 
@@ -289,27 +390,23 @@ class PreventiveMaintenanceSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'pm_id', 'pmtitle', 'scheduled_date', 'completed_date',
             'frequency', 'custom_days', 'notes', 'before_image_url',
-            'after_image_url', 'property', 'property_id', 'room', 'room_id',
+            'after_image_url', 'before_image', 'after_image', 'property', 'property_id', 'room', 'room_id',
             'machines', 'topics', 'status', 'procedure', 'created_at',
             'updated_at'
         ]
         read_only_fields = ['created_at', 'updated_at']
 
+    def get_before_image_url(self, obj):
+        return image_url(obj.before_image, self.context.get('request'))
+
+    def get_after_image_url(self, obj):
+        return image_url(obj.after_image, self.context.get('request'))
+
     def get_before_image(self, obj):
-        if obj.before_image:
-            return {
-                'url': obj.before_image.url,
-                'name': obj.before_image.name.split('/')[-1]
-            }
-        return None
+        return image_payload(obj.before_image, self.context.get('request'))
 
     def get_after_image(self, obj):
-        if obj.after_image:
-            return {
-                'url': obj.after_image.url,
-                'name': obj.after_image.name.split('/')[-1]
-            }
-        return None
+        return image_payload(obj.after_image, self.context.get('request'))
 
 class PreventiveMaintenanceCreateSerializer(serializers.ModelSerializer):
     machine_ids = serializers.ListField(
@@ -365,6 +462,8 @@ class PreventiveMaintenanceCreateSerializer(serializers.ModelSerializer):
                 maintenance=maintenance,
                 machine_id=machine_id
             )
+        # Through-model writes send no m2m_changed signal.
+        refresh_machines(machine_ids)
 
         # Create topic relationships
         for topic_id in topic_ids:
@@ -438,6 +537,7 @@ class PreventiveMaintenanceUpdateSerializer(serializers.ModelSerializer):
                     maintenance=instance,
                     machine_id=machine_id
                 )
+            refresh_machines(machine_ids)
 
         if topic_ids is not None:
             instance.topics.clear()
@@ -447,4 +547,22 @@ class PreventiveMaintenanceUpdateSerializer(serializers.ModelSerializer):
                     topic_id=topic_id
                 )
 
-        return instance 
\ No newline at end of file
+        return instance 
+
+class AutoAssignSerializer(serializers.Serializer):
+    job_ids = serializers.ListField(child=serializers.IntegerField(), required=False)
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=5000, default=2000)
+
+class BatchSubRequestSerializer(serializers.Serializer):
+    id = serializers.CharField(required=False)
+    method = serializers.ChoiceField(choices=['GET'], default='GET')
+    path = serializers.CharField()
+
+class BatchRequestSerializer(serializers.Serializer):
+    requests = BatchSubRequestSerializer(many=True, allow_empty=False)
+
+    def validate_requests(self, value):
+        limit = getattr(settings, 'BATCH_MAX_REQUESTS', 25)
+        if len(value) > limit:
+            raise serializers.ValidationError(f"A batch may contain at most {limit} requests")
+        return value
@@ -0,0 +1,155 @@
+"""
+SLA deadlines for jobs.
+
+An ``SLAPolicy`` gives the resolution time for a priority, either for one job
+type or (with an empty type) for every type without its own policy.
+``Job.save`` keeps ``due_at`` current whenever status, priority or type
+change: the clock runs while a job is pending or in progress, stops when it
+is put on hold or closed and restarts when it is reopened. The start of the
+running clock is stored in ``sla_started_at``, so a priority or type change
+(escalation included) applies the new resolution time to the same start.
+Escalation recomputes ``due_at`` in its UPDATE, so a later save does not see
+a changed deadline and clear ``escalated_at``.
+
+Open jobs with a deadline are covered by the partial ``job_open_due_idx``
+index, so both the at-risk query and the escalation pass are one range scan
+over ``due_at``.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, DateTimeField, F, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .audit import audit_scope, record_entry
+from .caching import bump_cache_version, cache_version
+from .changefeed import record_changes
+from .models import Job, SLAPolicy
+
+ACTIVE_STATUSES = ('pending', 'in_progress')
+ESCALATION = {'low': 'medium', 'medium': 'high', 'high': 'urgent'}
+NAMESPACE = 'sla-policies'
+
+
+def invalidate_policies():
+    bump_cache_version(NAMESPACE)
+
+
+def _policies():
+    return cache.get_or_set(
+        f'{NAMESPACE}:{cache_version(NAMESPACE)}',
+        lambda: {
+            (priority, job_type): hours
+            for priority, job_type, hours in SLAPolicy.objects.filter(is_active=True).values_list(
+                'priority', 'type', 'resolution_hours'
+            )
+        },
+        None,
+    )
+
+
+def resolution_time(priority, job_type):
+    """The SLA resolution time for a priority and job type, or None without a policy."""
+    policies = _policies()
+    hours = policies.get((priority, job_type), policies.get((priority, '')))
+    return None if hours is None else timedelta(hours=float(hours))
+
+
+def _clock_start(job, now):
+    if job._state.adding:
+        return job.created_at or now
+    if job.has_original('status') and job.original_value('status') not in ACTIVE_STATUSES:
+        return now
+    return job.sla_started_at or job.created_at or now
+
+
+def refresh_due_at(job, now=None):
+    """Recompute ``job.sla_started_at`` and ``job.due_at``; returns whether either changed.
+
+    A new deadline clears ``escalated_at``.
+    """
+    started_at = due_at = None
+    if job.status in ACTIVE_STATUSES:
+        started_at = _clock_start(job, now or timezone.now())
+        allowed = resolution_time(job.priority, job.type)
+        if allowed is not None:
+            due_at = started_at + allowed
+    changed = started_at != job.sla_started_at
+    job.sla_started_at = started_at
+    if due_at == job.due_at:
+        return changed
+    job.due_at = due_at
+    job.escalated_at = None
+    return True
+
+
+def backfill_due_dates():
+    """Start the clock at ``created_at`` on active jobs without a deadline; one UPDATE per policy."""
+    policies = _policies()
+    updated = 0
+    for (priority, job_type), hours in policies.items():
+        jobs = Job.objects.filter(status__in=ACTIVE_STATUSES, priority=priority, due_at__isnull=True)
+        if job_type:
+            jobs = jobs.filter(type=job_type)
+        else:
+            jobs = jobs.exclude(type__in=[t for p, t in policies if p == priority and t])
+        updated += jobs.update(
+            sla_started_at=Coalesce('sla_started_at', 'created_at'),
+            due_at=Coalesce('sla_started_at', 'created_at') + timedelta(hours=float(hours)),
+        )
+    return updated
+
+
+def at_risk(queryset, hours, now=None):
+    """Active jobs of ``queryset`` whose deadline falls within ``hours``, breached ones included."""
+    horizon = (now or timezone.now()) + timedelta(hours=hours)
+    return queryset.filter(status__in=ACTIVE_STATUSES, due_at__lte=horizon).order_by('due_at', 'pk')
+
+
+def _escalated_due_at():
+    """``due_at`` at the escalated priority, from the clock start and the new priority's policy."""
+    start = Coalesce('sla_started_at', 'created_at')
+    typed, untyped = [], []
+    for (priority, job_type), hours in _policies().items():
+        for current, raised in ESCALATION.items():
+            if priority != raised:
+                continue
+            due_at = start + timedelta(hours=float(hours))
+            if job_type:
+                typed.append(When(priority=current, type=job_type, then=due_at))
+            else:
+                untyped.append(When(priority=current, then=due_at))
+    return Case(*typed, *untyped, default=F('due_at'), output_field=DateTimeField())
+
+
+def escalate_breached(now=None, limit=None):
+    """Raise the priority of breached, not yet escalated jobs in one UPDATE; returns their ids."""
+    now = now or timezone.now()
+    limit = limit or getattr(settings, 'SLA_ESCALATION_BATCH', 5000)
+    with audit_scope(), transaction.atomic():
+        breached = Job.objects.filter(
+            status__in=ACTIVE_STATUSES, due_at__lte=now, escalated_at__isnull=True
+        ).order_by('due_at')
+        missed = dict(breached.select_for_update(skip_locked=True).values_list('pk', 'due_at')[:limit])
+        ids = list(missed)
+        if not ids:
+            return []
+        Job.objects.filter(pk__in=ids).update(
+            priority=Case(
+                *(When(priority=current, then=Value(raised)) for current, raised in ESCALATION.items()),
+                default=F('priority'),
+            ),
+            sla_started_at=Coalesce('sla_started_at', 'created_at'),
+            due_at=_escalated_due_at(),
+            escalated_at=now,
+            updated_at=now,
+        )
+        escalated = list(Job.objects.filter(pk__in=ids))
+        record_changes(escalated, 'updated')
+        for job in escalated:
+            record_entry(job.pk, 'escalated', f'SLA deadline {missed[job.pk]} passed; priority now {job.priority}',
+                         previous_status=job.status, new_status=job.status)
+    return ids
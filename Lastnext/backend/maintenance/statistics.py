@@ -0,0 +1,157 @@
+"""
+Statistics aggregates for the viewset ``statistics`` actions.
+
+Each statistic is a set of independent aggregate queries. The coroutines here
+run them concurrently, every query on its own worker thread and therefore its
+own database connection, so a response costs roughly the slowest query rather
+than the sum. They can be awaited from ASGI views directly; the DRF actions
+call them through ``async_to_sync``.
+"""
+import asyncio
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.db import close_old_connections, connection
+from django.db.models import Count, F, Q
+
+from .models import Job, Machine, PreventiveMaintenance, Room
+
+
+def _on_own_connection(query):
+    def run():
+        close_old_connections()
+        try:
+            return query()
+        finally:
+            close_old_connections()
+    return run
+
+
+async def gather_queries(queries):
+    """Evaluate a dict of zero-argument query callables concurrently."""
+    names = list(queries)
+    # Checked on the caller's thread, which owns the request's connection.
+    in_transaction = await sync_to_async(lambda: connection.in_atomic_block)()
+    if in_transaction:
+        # Other connections cannot see this transaction's uncommitted rows.
+        results = [await sync_to_async(queries[name])() for name in names]
+    else:
+        results = await asyncio.gather(*(
+            sync_to_async(_on_own_connection(queries[name]), thread_sensitive=False)()
+            for name in names
+        ))
+    return dict(zip(names, results))
+
+
+def _active_counts(queryset):
+    return queryset.aggregate(total=Count('id'), active=Count('id', filter=Q(is_active=True)))
+
+
+def _completion_counts(queryset, completed):
+    return queryset.aggregate(total=Count('id'), completed=Count('id', filter=completed))
+
+
+async def property_statistics(property_id):
+    results = await gather_queries({
+        'rooms': lambda: _active_counts(Room.objects.filter(property_id=property_id)),
+        'machines': lambda: _active_counts(Machine.objects.filter(property_id=property_id)),
+        'jobs': lambda: _completion_counts(
+            Job.objects.filter(property_id=property_id), Q(status='completed')
+        ),
+        'maintenance': lambda: _completion_counts(
+            PreventiveMaintenance.objects.filter(property_id=property_id),
+            Q(completed_date__isnull=False),
+        ),
+    })
+    return {
+        'total_rooms': results['rooms']['total'],
+        'active_rooms': results['rooms']['active'],
+        'total_machines': results['machines']['total'],
+        'active_machines': results['machines']['active'],
+        'total_jobs': results['jobs']['total'],
+        'completed_jobs': results['jobs']['completed'],
+        'total_maintenance': results['maintenance']['total'],
+        'completed_maintenance': results['maintenance']['completed'],
+    }
+
+
+async def room_statistics(room_id):
+    results = await gather_queries({
+        'machines': lambda: _active_counts(Machine.objects.filter(room_id=room_id)),
+        'jobs': lambda: _completion_counts(
+            Job.objects.filter(room=room_id), Q(status='completed')
+        ),
+        'maintenance': lambda: _completion_counts(
+            PreventiveMaintenance.objects.filter(room_id=room_id),
+            Q(completed_date__isnull=False),
+        ),
+    })
+    return {
+        'total_machines': results['machines']['total'],
+        'active_machines': results['machines']['active'],
+        'total_jobs': results['jobs']['total'],
+        'completed_jobs': results['jobs']['completed'],
+        'total_maintenance': results['maintenance']['total'],
+        'completed_maintenance': results['maintenance']['completed'],
+    }
+
+
+async def user_statistics(user_id):
+    results = await gather_queries({
+        'assigned': lambda: _completion_counts(
+            Job.objects.filter(assigned_to_id=user_id), Q(status='completed')
+        ),
+        'created': lambda: Job.objects.filter(created_by_id=user_id).count(),
+        'recent_activity': lambda: list(
+            Job.objects.filter(assigned_to_id=user_id)
+            .order_by('-updated_at')[:5]
+            .values('job_id', 'title', 'status', 'updated_at')
+        ),
+    })
+    assigned = results['assigned']
+    return {
+        'assigned_jobs': assigned['total'],
+        'completed_jobs': assigned['completed'],
+        'created_jobs': results['created'],
+        'job_completion_rate': (
+            assigned['completed'] / assigned['total'] * 100
+            if assigned['total'] > 0 else 0
+        ),
+        'recent_activity': results['recent_activity'],
+    }
+
+
+async def maintenance_statistics(queryset):
+    results = await gather_queries({
+        'counts': lambda: queryset.aggregate(
+            total=Count('id'),
+            completed=Count('id', filter=Q(status='completed')),
+            pending=Count('id', filter=Q(status='pending')),
+            overdue=Count('id', filter=Q(status='overdue')),
+        ),
+        'frequency_distribution': lambda: list(
+            queryset.values('frequency')
+            .annotate(count=Count('id'))
+            .order_by('frequency')
+        ),
+        # Counted from the scoped PMs so other properties' machines never show up.
+        'machine_distribution': lambda: list(
+            queryset.filter(machines__isnull=False)
+            .values(machine_id=F('machines__machine_id'), name=F('machines__name'))
+            .annotate(count=Count('id'))
+            .order_by('-count', 'machine_id')
+        ),
+    })
+    counts = results['counts']
+    return {
+        'counts': counts,
+        'frequency_distribution': results['frequency_distribution'],
+        'machine_distribution': results['machine_distribution'],
+        'completion_rate': (
+            counts['completed'] / counts['total'] * 100
+            if counts['total'] > 0 else 0
+        ),
+    }
+
+
+def run_statistics(coroutine_function, *args):
+    return async_to_sync(coroutine_function)(*args)
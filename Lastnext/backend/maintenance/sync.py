@@ -0,0 +1,139 @@
+"""
+Delta sync for offline clients.
+
+``?updated_since=<token>`` on a list endpoint returns rows changed since the
+token (an ``updated_at`` range scan on the property-leading indexes) plus
+tombstones from ``DeletionLog``, and a new token. Tokens are signed
+``(updated_at, pk)`` positions that never move backwards, so pages stay
+disjoint even when many rows share one ``updated_at``; an empty token starts
+a full sync. Tombstones are paged along with the rows (at most
+SYNC_PAGE_SIZE per response) and kept for SYNC_TOMBSTONE_RETENTION_DAYS by
+``manage.py prune_deletion_log``; older tokens get 410 Gone.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from .access import property_id_of, user_property_ids
+from .models import DeletionLog, Job, JobChecklistItem, Machine, PreventiveMaintenance, Room
+
+SYNC_ENTITIES = {
+    Job: 'job',
+    PreventiveMaintenance: 'preventive_maintenance',
+    JobChecklistItem: 'job_checklist_item',
+    Room: 'room',
+    Machine: 'machine',
+}
+
+TOKEN_SALT = 'maintenance.sync'
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def record_deletion(instance):
+    DeletionLog.objects.create(
+        entity=SYNC_ENTITIES[type(instance)],
+        entity_id=instance.pk,
+        property_id=property_id_of(instance),
+    )
+
+
+def make_token(moment, pk=None):
+    return signing.dumps({'t': moment.isoformat(), 'pk': pk}, salt=TOKEN_SALT, compress=True)
+
+
+def parse_token(token):
+    """The ``(updated_at, pk)`` position a token resumes after; pk is None to include all of updated_at."""
+    if not token or token == '0':
+        return EPOCH, None
+    try:
+        data = signing.loads(token, salt=TOKEN_SALT)
+        pk = data.get('pk')
+        return datetime.fromisoformat(data['t']), None if pk is None else int(pk)
+    except (signing.BadSignature, AttributeError, KeyError, TypeError, ValueError):
+        raise ValidationError({'updated_since': 'Invalid sync token'})
+
+
+def retention():
+    return timedelta(days=getattr(settings, 'SYNC_TOMBSTONE_RETENTION_DAYS', 30))
+
+
+def _tombstones(entity, since, until, property_ids, limit):
+    """Up to ``limit`` deleted ids from [since, until) and, if more remain, the time they resume at."""
+    tombstones = DeletionLog.objects.filter(entity=entity, deleted_at__gte=since)
+    if until is not None:
+        tombstones = tombstones.filter(deleted_at__lt=until)
+    if property_ids is not None:
+        tombstones = tombstones.filter(property_id__in=property_ids)
+    rows = list(tombstones.order_by('deleted_at', 'pk').values_list('entity_id', 'deleted_at')[:limit + 1])
+    if len(rows) <= limit:
+        return [entity_id for entity_id, _ in rows], None
+    resume_at = rows[limit][1]
+    if resume_at <= since:
+        # More than a page deleted in the same instant; send the whole instant.
+        return list(tombstones.filter(deleted_at__lte=since).values_list('entity_id', flat=True)), None
+    return [entity_id for entity_id, deleted_at in rows if deleted_at < resume_at], resume_at
+
+
+def _with_related(queryset, serializer_class):
+    """Join the nested objects and prefetch the nested lists ``serializer_class`` renders."""
+    joined, prefetched = [], []
+    for field in serializer_class().fields.values():
+        if field.write_only or field.source == '*' or '.' in field.source:
+            continue
+        if isinstance(field, serializers.ListSerializer):
+            prefetched.append(field.source)
+        elif isinstance(field, serializers.BaseSerializer):
+            joined.append(field.source)
+    return queryset.select_related(*joined).prefetch_related(*prefetched)
+
+
+def delta_sync_response(view, request):
+    since, after_pk = parse_token(request.query_params.get('updated_since'))
+    now = timezone.now()
+    if since != EPOCH and since < now - retention():
+        return Response(
+            {'detail': 'Sync token expired; a full sync is required.'},
+            status=status.HTTP_410_GONE
+        )
+
+    page_size = getattr(settings, 'SYNC_PAGE_SIZE', 500)
+    if after_pk is None:
+        position = Q(updated_at__gte=since)
+    else:
+        position = Q(updated_at__gt=since) | Q(updated_at=since, pk__gt=after_pk)
+    queryset = _with_related(view.filter_queryset(view.get_queryset()), view.get_serializer_class())
+    rows = list(queryset.filter(position).order_by('updated_at', 'pk')[:page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    next_pk = None
+    if has_more:
+        next_since, next_pk = rows[-1].updated_at, rows[-1].pk
+    else:
+        # Leave room for transactions that stamped updated_at but had not
+        # committed yet; rows they touched are sent again, never skipped.
+        grace = timedelta(seconds=getattr(settings, 'SYNC_GRACE_SECONDS', 30))
+        next_since = max(since, now - grace)
+
+    entity = SYNC_ENTITIES[view.get_queryset().model]
+    deleted, resume_at = _tombstones(
+        entity, since, next_since if has_more else None, user_property_ids(request.user), page_size
+    )
+    if resume_at is not None:
+        # More tombstones than a page: stop at the first one left out (rows
+        # changed after it are sent again), unless that is past the token.
+        has_more = True
+        if resume_at < next_since or next_since <= since:
+            next_since, next_pk = resume_at, None
+    return Response({
+        'results': view.get_serializer(rows, many=True).data,
+        'deleted': deleted,
+        'sync_token': make_token(next_since, next_pk),
+        'has_more': has_more,
+    })
@@ -0,0 +1,135 @@
+"""
+Dirty-field tracking and write accounting.
+
+``DirtyFieldsMixin`` snapshots the concrete fields an instance was loaded
+with. ``save()`` on a loaded instance then writes only the fields that
+changed (plus ``auto_now`` fields). When nothing changed it does nothing at
+all: no query, no ``auto_now`` touch of ``updated_at`` and no pre_save or
+post_save signals. Pass ``update_fields`` to force a write. Receivers read
+the loaded values with ``original_value()`` while the save is in progress.
+
+Mutable values are copied into the snapshot so in-place edits show up as
+changes: lists of scalars with a shallow copy, anything else with a deep
+copy. Non-editable fields (``Job.text_signature``, ...) are only ever
+replaced, never edited in place, so they are kept by reference for free.
+
+``WriteStats`` counts rows and bound-parameter bytes sent by INSERT, UPDATE
+and DELETE statements; ``maintenance.middleware.WriteStatsMiddleware``
+reports them per request.
+"""
+import copy
+
+from django.db.models.fields.files import FieldFile
+
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE')
+
+
+SCALARS = (str, int, float, bool, type(None))
+
+
+def _current(value):
+    return value.name if isinstance(value, FieldFile) else value
+
+
+def _snapshot_value(field, value):
+    if isinstance(value, FieldFile):
+        return value.name
+    if not field.editable or not isinstance(value, (dict, list)):
+        return value
+    if isinstance(value, list) and all(isinstance(item, SCALARS) for item in value):
+        return list(value)
+    return copy.deepcopy(value)
+
+
+class DirtyFieldsMixin:
+    _original_state = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot()
+        return instance
+
+    def _snapshot(self, fields=None):
+        state = {} if fields is None or self._original_state is None else dict(self._original_state)
+        for field in self._meta.concrete_fields:
+            if field.attname in self.__dict__ and (fields is None or field.attname in fields or field.name in fields):
+                state[field.attname] = _snapshot_value(field, self.__dict__[field.attname])
+        self._original_state = state
+
+    def has_original(self, *names):
+        """Whether the loaded values of ``names`` are known."""
+        if self._original_state is None:
+            return False
+        return all(self._meta.get_field(name).attname in self._original_state for name in names)
+
+    def original_value(self, name):
+        """The value ``name`` had when loaded or last saved; None if unknown."""
+        if self._original_state is None:
+            return None
+        return self._original_state.get(self._meta.get_field(name).attname)
+
+    def get_dirty_fields(self):
+        if self._original_state is None:
+            return {field.name for field in self._meta.concrete_fields if not field.primary_key}
+        return {
+            field.name for field in self._meta.concrete_fields
+            if field.attname in self.__dict__ and (
+                field.attname not in self._original_state
+                or _current(self.__dict__[field.attname]) != self._original_state[field.attname]
+            )
+        }
+
+    def is_dirty(self):
+        return bool(self.get_dirty_fields())
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self._snapshot(fields)
+
+    def save(self, *args, **kwargs):
+        tracked = (
+            not args
+            and not self._state.adding
+            and self._original_state is not None
+            and kwargs.get('update_fields') is None
+            and not kwargs.get('force_insert')
+        )
+        if tracked:
+            dirty = self.get_dirty_fields()
+            if not dirty:
+                return
+            dirty.update(
+                field.name for field in self._meta.concrete_fields
+                if getattr(field, 'auto_now', False)
+            )
+            kwargs['update_fields'] = dirty
+        super().save(*args, **kwargs)
+        self._snapshot(kwargs.get('update_fields'))
+
+
+def _param_bytes(value):
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if isinstance(value, (list, tuple)):
+        return sum(_param_bytes(item) for item in value)
+    return len(str(value).encode())
+
+
+class WriteStats:
+    """``connection.execute_wrapper`` that tallies rows and bytes written."""
+
+    def __init__(self):
+        self.statements = 0
+        self.rows = 0
+        self.bytes = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        result = execute(sql, params, many, context)
+        if sql.lstrip()[:6].upper() in WRITE_STATEMENTS:
+            self.statements += 1
+            self.rows += max(context['cursor'].rowcount, 0)
+            self.bytes += _param_bytes(list(params) if many else params)
+        return result
@@ -13,7 +13,14 @@ router.register(r'jobs', views.JobViewSet)
 router.register(r'job-attachments', views.JobAttachmentViewSet)
 router.register(r'job-checklist', views.JobChecklistItemViewSet)
 router.register(r'job-history', views.JobHistoryViewSet)
+router.register(r'checklist-templates', views.ChecklistTemplateViewSet)
+router.register(r'dashboard', views.DashboardViewSet, basename='dashboard')
+router.register(r'reports', views.ReportViewSet, basename='reports')
 
 urlpatterns = [
+    path('batch/', views.BatchView.as_view(), name='batch'),
+    path('changes/stream/', views.ChangeFeedView.as_view(), name='change-feed'),
+    path('admission/metrics/', views.AdmissionMetricsView.as_view(), name='admission-metrics'),
+    path('images/<path:name>', views.ImageView.as_view(), name='image'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
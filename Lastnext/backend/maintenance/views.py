@@ -1,13 +1,18 @@
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.views import APIView
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Count, Q
+from django.db import transaction
+from django.core.files.storage import default_storage
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404, StreamingHttpResponse
 from django.utils import timezone
+from datetime import date, timedelta
 from .models import (
     User, UserProfile, Topic, Machine, PreventiveMaintenance, Job,
-    JobAttachment, JobChecklistItem, JobHistory, Property, Room
+    JobAttachment, JobChecklistItem, JobHistory, Property, Room, ChecklistTemplate
 )
 from .serializers import (
     UserSerializer, UserProfileSerializer, UserCreateSerializer, UserUpdateSerializer,
@@ -15,14 +20,38 @@ from .serializers import (
     JobSerializer, JobAttachmentSerializer, JobChecklistItemSerializer,
     JobHistorySerializer, JobCreateSerializer, JobUpdateSerializer,
     PreventiveMaintenanceCreateSerializer, PreventiveMaintenanceUpdateSerializer,
-    PropertySerializer, RoomSerializer
+    PropertySerializer, RoomSerializer, AutoAssignSerializer, BatchRequestSerializer,
+    ChecklistTemplateSerializer
+)
+from .mixins import (
+    AdmissionControlMixin, BatchIdentityMapMixin, DeltaSyncMixin, FastListMixin,
+    PropertyScopedMixin, ReplicaReadMixin, StreamingJSONMixin
+)
+from .dashboard import dashboard_summary_for
+from .batch import dispatch_sub_request, identity_map_scope
+from .access import scoped_property_ids, user_property_ids
+from .rollups import GROUPINGS, job_trends
+from .assignment import auto_assign
+from .audit import audit_scope
+from .pm_calendar import pm_calendar
+from .changefeed import change_stream
+from .reports import REPORT_KINDS, get_or_render_report, report_hash
+from .images import original_name, signed_seconds_left
+from .admission import admission_metrics
+from .hierarchy import property_tree, tree_etag
+from .sla import at_risk
+from .forecasting import capacity_plan
+from .statistics import (
+    maintenance_statistics, property_statistics, room_statistics, run_statistics,
+    user_statistics
 )
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(StreamingJSONMixin, AdmissionControlMixin, BatchIdentityMapMixin, ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     permission_classes = [IsAuthenticated]
     filterset_fields = ['is_active', 'is_staff']
     search_fields = ['username', 'email', 'first_name', 'last_name', 'phone_number']
+    admission_classes = {'statistics': 'statistics', 'search': 'search'}
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -45,44 +74,39 @@ class UserViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def statistics(self, request, pk=None):
         user = self.get_object()
-        stats = {
-            'assigned_jobs': user.assigned_jobs.count(),
-            'completed_jobs': user.assigned_jobs.filter(status='completed').count(),
-            'created_jobs': user.created_jobs.count(),
-            'job_completion_rate': (
-                user.assigned_jobs.filter(status='completed').count() /
-                user.assigned_jobs.count() * 100
-                if user.assigned_jobs.count() > 0 else 0
-            ),
-            'recent_activity': user.assigned_jobs.order_by('-updated_at')[:5].values(
-                'job_id', 'title', 'status', 'updated_at'
-            ),
-        }
-        return Response(stats)
+        return Response(run_statistics(user_statistics, user.pk))
 
     @action(detail=False, methods=['get'])
     def me(self, request):
         serializer = self.get_serializer(request.user)
         return Response(serializer.data)
 
-class TopicViewSet(viewsets.ModelViewSet):
+class TopicViewSet(StreamingJSONMixin, BatchIdentityMapMixin, ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = Topic.objects.all()
     serializer_class = TopicSerializer
     filter_backends = [filters.SearchFilter]
     search_fields = ['title', 'description']
 
-class MachineViewSet(viewsets.ModelViewSet):
+class MachineViewSet(StreamingJSONMixin, AdmissionControlMixin, DeltaSyncMixin, FastListMixin, PropertyScopedMixin, BatchIdentityMapMixin, ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = Machine.objects.all()
     serializer_class = MachineSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
-    filterset_fields = ['status', 'property_id', 'is_active']
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filterset_fields = {
+        'status': ['exact'],
+        'property_id': ['exact'],
+        'is_active': ['exact'],
+        'next_maintenance_date': ['exact', 'lte', 'gte', 'isnull'],
+    }
     search_fields = ['name', 'description', 'machine_id']
+    ordering_fields = ['next_maintenance_date', 'last_maintenance_date', 'maintenance_count', 'name']
+    admission_classes = {'search': 'search'}
 
-class PreventiveMaintenanceViewSet(viewsets.ModelViewSet):
+class PreventiveMaintenanceViewSet(StreamingJSONMixin, AdmissionControlMixin, DeltaSyncMixin, PropertyScopedMixin, BatchIdentityMapMixin, ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = PreventiveMaintenance.objects.all()
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     filterset_fields = ['status', 'frequency', 'property_id']
     search_fields = ['pmtitle', 'notes']
+    admission_classes = {'statistics': 'statistics', 'calendar': 'statistics', 'search': 'search'}
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -93,40 +117,33 @@ class PreventiveMaintenanceViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def statistics(self, request):
-        total = self.queryset.count()
-        completed = self.queryset.filter(status='completed').count()
-        pending = self.queryset.filter(status='pending').count()
-        overdue = self.queryset.filter(status='overdue').count()
-
-        frequency_distribution = (
-            self.queryset.values('frequency')
-            .annotate(count=Count('id'))
-            .order_by('frequency')
-        )
+        return Response(run_statistics(maintenance_statistics, self.get_queryset()))
 
-        machine_distribution = (
-            Machine.objects.values('machine_id', 'name')
-            .annotate(count=Count('maintenance_tasks'))
-            .order_by('-count')
-        )
+    @action(detail=False, methods=['get'])
+    def calendar(self, request):
+        try:
+            start = date.fromisoformat(request.query_params['start'])
+            end = date.fromisoformat(request.query_params['end'])
+        except (KeyError, ValueError):
+            return Response(
+                {'detail': 'start and end are required as YYYY-MM-DD dates'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if end < start or (end - start).days > 366:
+            return Response(
+                {'detail': 'end must be after start and within 366 days of it'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        return Response({
-            'counts': {
-                'total': total,
-                'completed': completed,
-                'pending': pending,
-                'overdue': overdue
-            },
-            'frequency_distribution': frequency_distribution,
-            'machine_distribution': machine_distribution,
-            'completion_rate': (completed / total * 100) if total > 0 else 0
-        })
+        property_ids = scoped_property_ids(request.user, request.query_params.get('property'))
+        return Response(pm_calendar(start, end, property_ids))
 
-class JobViewSet(viewsets.ModelViewSet):
+class JobViewSet(StreamingJSONMixin, AdmissionControlMixin, DeltaSyncMixin, FastListMixin, PropertyScopedMixin, BatchIdentityMapMixin, ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = Job.objects.all()
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     filterset_fields = ['status', 'priority', 'type', 'property_id', 'assigned_to']
     search_fields = ['title', 'description', 'notes']
+    admission_classes = {'search': 'search', 'auto_assign': 'export'}
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -135,7 +152,23 @@ class JobViewSet(viewsets.ModelViewSet):
             return JobUpdateSerializer
         return JobSerializer
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'at_risk':
+            queryset = at_risk(queryset, self._at_risk_hours)
+        return queryset
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+        if getattr(serializer, 'merged', False):
+            return Response(serializer.data, status=status.HTTP_200_OK)
+        headers = self.get_success_headers(serializer.data)
+        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+
     def perform_create(self, serializer):
+        self.check_property_scope(serializer)
         serializer.save(created_by=self.request.user)
 
     @action(detail=True, methods=['post'])
@@ -150,83 +183,278 @@ class JobViewSet(viewsets.ModelViewSet):
         }, partial=True)
         
         if serializer.is_valid():
-            serializer.save()
-            JobHistory.objects.create(
-                job=job,
-                action='completed',
-                description=f'Job completed by {request.user.username}',
-                performed_by=request.user,
-                previous_status=job.status,
-                new_status='completed'
-            )
+            with audit_scope(request.user), transaction.atomic():
+                serializer.save()
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class JobAttachmentViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['get'], url_path='at-risk')
+    def at_risk(self, request):
+        try:
+            self._at_risk_hours = float(request.query_params.get('hours', 24))
+        except ValueError:
+            self._at_risk_hours = -1
+        if not 0 <= self._at_risk_hours <= 24 * 366:
+            return Response(
+                {'detail': 'hours must be a number between 0 and 8784'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return self.list(request)
+
+    @action(detail=False, methods=['post'], url_path='auto-assign', permission_classes=[IsAdminUser])
+    def auto_assign(self, request):
+        serializer = AutoAssignSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        assignments = auto_assign(
+            request.user,
+            job_ids=serializer.validated_data.get('job_ids'),
+            limit=serializer.validated_data['limit'],
+        )
+        return Response({
+            'assigned': len(assignments),
+            'assignments': [
+                {'job': job_pk, 'assigned_to': user_id}
+                for job_pk, user_id in assignments.items()
+            ],
+        })
+
+class JobAttachmentViewSet(StreamingJSONMixin, PropertyScopedMixin, BatchIdentityMapMixin, ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = JobAttachment.objects.all()
+    property_lookup = 'job__property_id'
     serializer_class = JobAttachmentSerializer
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['job', 'uploaded_by']
 
     def perform_create(self, serializer):
+        self.check_property_scope(serializer)
         serializer.save(uploaded_by=self.request.user)
 
-class JobChecklistItemViewSet(viewsets.ModelViewSet):
+class JobChecklistItemViewSet(StreamingJSONMixin, DeltaSyncMixin, PropertyScopedMixin, BatchIdentityMapMixin, ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = JobChecklistItem.objects.all()
+    property_lookup = 'job__property_id'
     serializer_class = JobChecklistItemSerializer
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['job', 'is_completed']
 
     def perform_update(self, serializer):
+        self.check_property_scope(serializer)
         if serializer.validated_data.get('is_completed'):
             serializer.save(completed_by=self.request.user)
         else:
             serializer.save()
 
-class JobHistoryViewSet(viewsets.ReadOnlyModelViewSet):
+class ChecklistTemplateViewSet(StreamingJSONMixin, BatchIdentityMapMixin, ReplicaReadMixin, viewsets.ModelViewSet):
+    queryset = ChecklistTemplate.objects.prefetch_related('machines', 'topics', 'items')
+    serializer_class = ChecklistTemplateSerializer
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filterset_fields = ['machines', 'topics', 'is_active']
+    search_fields = ['name', 'description']
+
+class JobHistoryViewSet(StreamingJSONMixin, PropertyScopedMixin, BatchIdentityMapMixin, ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
     queryset = JobHistory.objects.all()
+    property_lookup = 'job__property_id'
     serializer_class = JobHistorySerializer
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['job', 'performed_by', 'action']
 
-class PropertyViewSet(viewsets.ModelViewSet):
+class PropertyViewSet(StreamingJSONMixin, AdmissionControlMixin, PropertyScopedMixin, BatchIdentityMapMixin, ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = Property.objects.all()
+    property_lookup = 'pk'
     serializer_class = PropertySerializer
     permission_classes = [IsAuthenticated]
     filterset_fields = ['is_active']
     search_fields = ['name', 'property_id', 'address', 'city', 'state', 'country']
+    admission_classes = {'statistics': 'statistics', 'search': 'search'}
 
     @action(detail=True, methods=['get'])
     def statistics(self, request, pk=None):
         property = self.get_object()
-        stats = {
-            'total_rooms': property.rooms.count(),
-            'active_rooms': property.rooms.filter(is_active=True).count(),
-            'total_machines': property.machines.count(),
-            'active_machines': property.machines.filter(is_active=True).count(),
-            'total_jobs': property.jobs.count(),
-            'completed_jobs': property.jobs.filter(status='completed').count(),
-            'total_maintenance': property.maintenance_tasks.count(),
-            'completed_maintenance': property.maintenance_tasks.filter(completed_date__isnull=False).count(),
-        }
-        return Response(stats)
-
-class RoomViewSet(viewsets.ModelViewSet):
+        return Response(run_statistics(property_statistics, property.pk))
+
+    @action(detail=True, methods=['get'])
+    def tree(self, request, pk=None):
+        try:
+            property_id = int(pk)
+        except ValueError:
+            return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        allowed = user_property_ids(request.user)
+        if allowed is not None and property_id not in allowed:
+            return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+        headers = {'Cache-Control': 'private, no-cache'}
+        etag = tree_etag(property_id)
+        if etag in request.headers.get('If-None-Match', ''):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={**headers, 'ETag': etag})
+        tree, etag = property_tree(property_id)
+        if tree is None:
+            return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(tree, headers={**headers, 'ETag': etag})
+
+class RoomViewSet(StreamingJSONMixin, AdmissionControlMixin, DeltaSyncMixin, FastListMixin, PropertyScopedMixin, BatchIdentityMapMixin, ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = Room.objects.all()
     serializer_class = RoomSerializer
     permission_classes = [IsAuthenticated]
     filterset_fields = ['property', 'is_active', 'floor']
     search_fields = ['name', 'room_id', 'description']
+    admission_classes = {'statistics': 'statistics', 'search': 'search'}
 
     @action(detail=True, methods=['get'])
     def statistics(self, request, pk=None):
         room = self.get_object()
-        stats = {
-            'total_machines': room.machines.count(),
-            'active_machines': room.machines.filter(is_active=True).count(),
-            'total_jobs': room.jobs.count(),
-            'completed_jobs': room.jobs.filter(status='completed').count(),
-            'total_maintenance': room.maintenance_tasks.count(),
-            'completed_maintenance': room.maintenance_tasks.filter(completed_date__isnull=False).count(),
-        }
-        return Response(stats)
\ No newline at end of file
+        return Response(run_statistics(room_statistics, room.pk))
+
+class DashboardViewSet(StreamingJSONMixin, AdmissionControlMixin, ReplicaReadMixin, viewsets.ViewSet):
+    permission_classes = [IsAuthenticated]
+    admission_classes = {'summary': 'statistics'}
+
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        return Response(dashboard_summary_for(request.user))
+
+class ReportViewSet(StreamingJSONMixin, AdmissionControlMixin, ReplicaReadMixin, viewsets.ViewSet):
+    permission_classes = [IsAuthenticated]
+    admission_classes = {'job_trends': 'statistics', 'capacity': 'statistics', 'pdf': 'export'}
+
+    @action(detail=False, methods=['get'], url_path='job-trends')
+    def job_trends(self, request):
+        try:
+            months = min(max(int(request.query_params.get('months', 12)), 1), 36)
+        except ValueError:
+            return Response({'months': 'Must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        group_by = request.query_params.get('group_by')
+        if group_by and group_by not in GROUPINGS:
+            return Response(
+                {'group_by': f"Must be one of {', '.join(GROUPINGS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        property_ids = scoped_property_ids(request.user, request.query_params.get('property'))
+        return Response(job_trends(months=months, property_ids=property_ids, group_by=group_by))
+
+    @action(detail=False, methods=['get'])
+    def capacity(self, request):
+        params = request.query_params
+        try:
+            start = date.fromisoformat(params['start']) if params.get('start') else timezone.localdate()
+            end = date.fromisoformat(params['end']) if params.get('end') else start + timedelta(days=13)
+        except ValueError:
+            return Response({'detail': 'start and end must be YYYY-MM-DD dates'}, status=status.HTTP_400_BAD_REQUEST)
+        if end < start or (end - start).days > 92:
+            return Response(
+                {'detail': 'end must be after start and within 92 days of it'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        property_ids = scoped_property_ids(request.user, request.query_params.get('property'))
+        return Response(capacity_plan(start, end, property_ids))
+
+    @action(detail=False, methods=['get'])
+    def pdf(self, request):
+        kind = request.query_params.get('kind', 'maintenance')
+        if kind not in REPORT_KINDS:
+            return Response(
+                {'kind': f"Must be one of {', '.join(REPORT_KINDS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            property_id = int(request.query_params['property'])
+            start = date.fromisoformat(request.query_params['start'])
+            end = date.fromisoformat(request.query_params['end'])
+        except (KeyError, ValueError):
+            return Response(
+                {'detail': 'property, start and end (YYYY-MM-DD) are required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if end < start or (end - start).days > 366:
+            return Response(
+                {'detail': 'end must be after start and within 366 days of it'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        allowed = user_property_ids(request.user)
+        if allowed is not None and property_id not in allowed:
+            return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+        digest = report_hash(kind, property_id, start, end)
+        headers = {'ETag': f'"{digest}"', 'Cache-Control': 'private, max-age=0, must-revalidate'}
+        if headers['ETag'] in request.headers.get('If-None-Match', ''):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        path = get_or_render_report(kind, property_id, start, end, digest)
+        response = FileResponse(
+            default_storage.open(path),
+            content_type='application/pdf',
+            filename=f'{kind}-{property_id}-{start}-{end}.pdf',
+        )
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+class ChangeFeedView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if not isinstance(request._request, ASGIRequest):
+            # Under WSGI Django drains an async iterator before sending it, so
+            # the endless stream would never flush and would hold the worker.
+            return Response(
+                {'detail': 'The change feed is only available when served over ASGI.'},
+                status=status.HTTP_501_NOT_IMPLEMENTED
+            )
+        property_ids = scoped_property_ids(request.user, request.query_params.get('property'))
+        last_event_id = request.headers.get('Last-Event-ID') or request.query_params.get('last_event_id')
+        last_event_id = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+
+        response = StreamingHttpResponse(
+            change_stream(property_ids, last_event_id),
+            content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+class ImageView(APIView):
+    # The signed URL is the credential: <img> requests carry no API token.
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request, name):
+        seconds_left = signed_seconds_left(
+            name, request.query_params.get('expires'), request.query_params.get('signature')
+        )
+        if seconds_left is None:
+            raise Http404
+        cache_control = f'private, max-age={seconds_left}, immutable'
+        if not default_storage.exists(name):
+            # Variant not generated yet: serve the original, briefly cached.
+            name = original_name(name)
+            if not default_storage.exists(name):
+                raise Http404
+            cache_control = f'private, max-age={min(seconds_left, 60)}'
+
+        response = FileResponse(default_storage.open(name, 'rb'))
+        response['Cache-Control'] = cache_control
+        return response
+
+class AdmissionMetricsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(admission_metrics())
+
+class BatchView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = BatchRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        prefix = request.path[:-len('batch/')] if request.path.endswith('batch/') else '/'
+        responses = []
+        with identity_map_scope():
+            for sub_request in serializer.validated_data['requests']:
+                status_code, body = dispatch_sub_request(request, prefix, sub_request['path'])
+                responses.append({
+                    'id': sub_request.get('id'),
+                    'status': status_code,
+                    'body': body,
+                })
+        return Response({'responses': responses})
\ No newline at end of file